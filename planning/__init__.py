@@ -0,0 +1,25 @@
+# Products Manufacturing with lowest cost
+# Shared model building blocks for the A/C/F/H formulations
+
+from .instance import Instance, baseInstance, scaleInstance
+from .builder import VARIANTS, PlanningModel, buildLoopModel, buildMatrixModel, compareBuilders, sameModel
+from .template import PlanningTemplate, costBreakdown, sweep
+from .sensitivity import sensitivityReport
+from .parametric import ParametricCurve, parametricCurve
+from .dp import solveContinuous
+from .heuristic import constructHirePlan, seedModel
+from .bounds import deriveBounds, tightenModel
+from .lint import lintModel
+from .rolling import rollingHorizon
+from .instance import syntheticInstance
+from .backends import solve
+from .results import SolveResult
+from .cache import SolveCache
+from .session import PlanningSession
+from .stochastic import solveStochastic
+from .montecarlo import stressTest
+from .certificate import checkSolution
+from .trace import traceSolve
+from .tuning import tuneVariant
+from .snapshot import SnapshotWriter, replaySnapshot
+from .phases import PhaseProfiler, profileRun
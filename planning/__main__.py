@@ -0,0 +1,653 @@
+# Products Manufacturing with lowest cost
+# Command line entry point: python -m planning <command> [options]
+
+
+import argparse
+import json
+import os
+
+import gurobipy
+import pandas as pd
+
+from .backends import BACKENDS, solve
+from .benchmark import (FORMULATIONS, compareBenchmarks, phaseSummary, readBenchmark, runBenchmark, throughput,
+                        writeBenchmark)
+from .bounds import compareTightening
+from .builder import VARIANTS, buildMatrixModel, compareBuilders
+from .cache import SolveCache
+from .dp import crossCheck, solveContinuous
+from .heuristic import compareSeeding
+from .instance import baseInstance, scaleInstance
+from .montecarlo import riskTable, stressTest
+from .parametric import parametricCurve
+from .phases import PhaseProfiler, aggregatePhases, phaseTable, profileRun
+from .profiles import profilePath, removeProfile
+from .results import TABLES, SolveResult
+from .rolling import compareRolling
+from .scenarios import loadScenarios, runScenarios
+from .session import PlanningSession
+from .snapshot import SnapshotWriter, findSnapshots, replaySnapshot
+from .stochastic import demandScenarios, extensiveForm, solveStochastic
+from .store import ResultStore, scenarioRows
+from .template import PlanningTemplate
+from .trace import summarizeTraces, traceSolve
+from .tuning import tuneVariant, tuningInstances
+from .sweeps import EXPERIMENTS, printSweep, runExperiment
+
+
+def _instance(args):
+    instance = baseInstance()
+    if (args.products, args.months) != (instance.nProducts, instance.nMonths):
+        instance = scaleInstance(instance, args.products, args.months)
+    return instance
+
+
+def solveCommand(args):
+    instance = _instance(args)
+    if args.annual:
+        instance = instance.copy(quarterLength=12)
+    built = buildMatrixModel(args.variant, instance, profile=args.profile)
+    params = {'MIPGap': 0}
+    if args.threads:
+        params['Threads'] = args.threads
+    writer = SnapshotWriter(args.snapshot) if args.snapshot else None
+    try:
+        if writer is not None:
+            for name, value in params.items():
+                built.model.setParam(name, value)
+            snapshot = writer.capture(built, args.variant)
+        result = solve(built, args.backend, params)
+        if writer is not None:
+            writer.record(snapshot, result)
+            writer.close()
+    finally:
+        built.model.dispose()
+    print('\n--------------------------------------------------------------------\n')
+    print(result.report(args.tables) if args.tables else result.report(()))
+    print('\nsolved with %s in %.3fs, %d nodes' % (result.backend, result.solveTime, result.nodes))
+    if result.profile is not None:
+        print('tuned profile of %s applied: %s' % (args.variant, result.profile or 'empty'))
+    if result.values:
+        certificate = result.certificate()
+        print('certificate: %s, largest violation %.2e, cost error %.2e' % (
+            'ok' if certificate['ok'] else 'failed ' + ', '.join(certificate['failed']),
+            certificate['maxViolation'], certificate['costError']))
+    if writer is not None:
+        _printSnapshots(writer)
+
+
+def stressCommand(args):
+    instance = _instance(args)
+    built = buildMatrixModel(args.variant, instance)
+    try:
+        result = solve(built, params={'MIPGap': 0})
+    finally:
+        built.model.dispose()
+    report = stressTest(result['x'], instance, args.paths, spread=args.spread, seed=args.seed, chunk=args.chunk)
+    print('plan of %s: %.2f euro, stock as planned %.2f euro holding' % (args.variant, result.objVal,
+                                                                      result.costs()['holding']))
+    print('%d demand paths with spread %.2f in %.3fs' % (report['paths'], args.spread, report['simulationTime']))
+    print('paths with a stockout: %.2f %%' % (100 * report['stockoutRate']))
+    print('salary %.2f euro, mean cost %.2f euro' % (report['salary'], report['meanCost']))
+    print('cost quantiles: %s' % ', '.join('%g: %.2f' % item for item in report['quantiles'].items()))
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print('\n-------------------------Stockout probability per month per type-------------------------')
+        print(riskTable(report).to_string(float_format='%.4f'))
+        print('\n-------------------------Expected shortfall per month per type-------------------------')
+        print(riskTable(report, 'expectedShortfall').to_string(float_format='%.2f'))
+
+
+def compareBuildersCommand(args):
+    instance = _instance(args)
+    print('%-3s %8s %8s %10s %10s %10s %10s %10s %10s %9s %9s %5s' % ('', 'vars', 'constrs', 'loop s', 'matrix s',
+          'loop MB', 'matrix MB', 'loop RSS', 'mat RSS', 'dup rows', 'dup nnz', 'same'))
+    for variant in args.variants:
+        row = compareBuilders(variant, instance)
+        print('%-3s %8d %8d %10.3f %10.3f %10.2f %10.2f %10.2f %10.2f %9d %9d %5s' % (
+            variant, row['vars'], row['constrs'], row['loopTime'], row['matrixTime'], row['loopPeakMB'],
+            row['matrixPeakMB'], row['loopRssMB'], row['matrixRssMB'], row['lintRows'], row['lintNonzeros'],
+            row['same']))
+
+
+def sweepCommand(args):
+    params = {'Threads': args.threads} if args.threads else None
+    store = ResultStore(args.store) if args.store else None
+    cache = SolveCache(args.cache) if args.cache else None
+    writer = SnapshotWriter(args.snapshot) if args.snapshot else None
+    for name in args.experiments or list(EXPERIMENTS):
+        profiler = PhaseProfiler(args.phases == 'memory') if args.phases else None
+        buildTime, points = runExperiment(name, _instance(args), rebuild=args.rebuild, params=params,
+                                          warmStart=args.warm_start, cold=args.cold, store=store, cache=cache,
+                                          snapshots=writer, profiler=profiler, profile=args.profile)
+        printSweep(name, buildTime, points)
+        if args.profile:
+            print('tuned profile applied: %s' % (points[0].get('profile') if points else None))
+        if profiler is not None:
+            profiler.close()
+            print()
+            print(pd.DataFrame(profiler.rows()).to_string(index=False, float_format='%.4f'))
+        print()
+    if cache is not None:
+        _printCache(cache.stats())
+    if writer is not None:
+        writer.close()
+        _printSnapshots(writer)
+
+
+def _printSnapshots(writer):
+    print('%d snapshots in %s' % (writer.count - len(writer.errors), writer.directory))
+    for path, error in writer.errors:
+        print('%s: %s' % (path, error))
+
+
+def phasesCommand(args):
+    sizes = [tuple(int(part) for part in size.split('x')) for size in args.sizes.split(',')]
+    runs = []
+    for products, months in sizes:
+        instance = scaleInstance(baseInstance(), products, months)
+        for variant in args.variants or VARIANTS:
+            for builder in args.builders.split(','):
+                for repeat in range(args.repeat):
+                    run = profileRun(variant, instance, builder, write=args.write, report=not args.no_report,
+                                     memory=not args.no_memory)
+                    runs.append(dict(run, products=products, months=months, repeat=repeat))
+    table = phaseTable(runs)
+    summary = aggregatePhases(table, by=('variant', 'builder', 'products', 'months'))
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(summary.to_string(index=False, float_format='%.4f'))
+    if args.output:
+        table.to_csv(args.output, index=False)
+
+
+def replayCommand(args):
+    params = {}
+    for setting in args.set:
+        name, value = setting.split('=', 1)
+        params[name] = float(value) if '.' in value or 'e' in value.lower() else int(value)
+    if args.threads:
+        params['Threads'] = args.threads
+    rows = [dict(replaySnapshot(path, params), repeat=repeat) for path in findSnapshots(args.paths)
+            for repeat in range(args.repeat)]
+    if not rows:
+        print('no snapshots in %s' % ', '.join(args.paths))
+        return
+    table = pd.DataFrame(rows)
+    columns = ['snapshot', 'variant', 'gurobi', 'status', 'recordedObjVal', 'objVal', 'recordedRuntime', 'runtime',
+               'recordedWork', 'work', 'nodes']
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.max_colwidth', 60):
+        print(table[columns].to_string(index=False, float_format='%.4f'))
+    changed = table[[recorded is not None and objVal is not None and
+                     abs(objVal - recorded) > 1e-6 * max(1.0, abs(recorded))
+                     for recorded, objVal in zip(table['recordedObjVal'], table['objVal'])]]
+    print('\n%d solves of %d snapshots, %.3fs runtime, %.3f work units, %d optima differ from the recorded ones' % (
+        len(table), len(table) // args.repeat, table['runtime'].sum(), table['work'].sum(), len(changed)))
+    if args.output:
+        table.to_csv(args.output, index=False)
+
+
+def _printCache(stats):
+    print('cache: %(hits)d hits, %(misses)d misses, %(evictions)d evicted, %(entries)d entries, %(bytes)d bytes'
+          % stats)
+
+
+def scenariosCommand(args):
+    table = runScenarios(loadScenarios(args.file), workers=args.workers, threads=args.threads,
+                         instance=_instance(args), cache=args.cache, profile=args.profile)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(table.drop(columns=['pid']).to_string(index=False, float_format='%.2f'))
+    print('\n%d jobs on %d workers x %d threads in %.2fs' % (len(table), table.attrs['workers'],
+                                                          table.attrs['threads'], table.attrs['wallTime']))
+    if args.output:
+        table.to_csv(args.output, index=False)
+    if args.store:
+        ResultStore(args.store).append(scenarioRows(table))
+    if args.cache:
+        hits = int(table['cached'].sum())
+        _printCache(dict(SolveCache(args.cache).stats(), hits=hits, misses=len(table) - hits))
+
+
+def sensitivityCommand(args):
+    template = PlanningTemplate('A', _instance(args), sensitivity=True)
+    point = template.optimize()
+    report = point['sensitivity']
+    print('Total costs : %10.2f euro\n' % point['objVal'])
+    with pd.option_context('display.width', 200, 'display.max_rows', None, 'display.float_format', '{:.2f}'.format):
+        for name in args.tables:
+            print('-------------------------%s-------------------------' % name)
+            print(report[name])
+            print()
+
+
+WHATIF_HELP = '''commands:
+  set PATH VALUE     e.g. set holdingCosts[2] 100, set storageMin 200
+  scale PATH FACTOR  e.g. scale demand[0,5:8] 10
+  undo               take back the last set or scale
+  revert             return to the baseline
+  show [TABLE ...]   the plan, any of x, r, n, b, v
+  quit'''
+
+
+def _printWhatif(point):
+    if point['objVal'] is None:
+        print('status %d, no optimal plan' % point['status'])
+        return
+    print('Total costs : %10.2f euro  (%+.2f against the baseline, %.4fs)' % (point['objVal'], point['delta'],
+                                                                            point['solveTime']))
+
+
+def whatifCommand(args):
+    session = PlanningSession(args.variant, _instance(args), params={'OutputFlag': 0}, profile=args.profile)
+    _printWhatif(session.baselinePoint)
+    print(WHATIF_HELP)
+    while True:
+        try:
+            line = input('> ').strip()
+        except EOFError:
+            break
+        words = line.split()
+        if not words:
+            continue
+        try:
+            if words[0] in ('set', 'scale') and len(words) >= 3:
+                path, value = line[len(words[0]):].strip().rsplit(None, 1)
+                _printWhatif(session.apply(**{words[0]: {path: json.loads(value)}}))
+            elif words[0] == 'undo':
+                _printWhatif(session.undo())
+            elif words[0] == 'revert':
+                _printWhatif(session.revert())
+            elif words[0] == 'show':
+                result = SolveResult.fromModel(session.template.built)
+                print(result.report([name for name in words[1:] or ['x', 'r'] if name in TABLES]))
+            elif words[0] in ('quit', 'exit'):
+                break
+            else:
+                print(WHATIF_HELP)
+        except ValueError as error:
+            print(error)
+        if session.changes():
+            print('in effect: %s' % '; '.join(session.changes()))
+    session.dispose()
+
+
+def curveCommand(args):
+    curve = parametricCurve(args.parameter, args.lo, args.hi, _instance(args), maxSolves=args.max_solves)
+    print('optimal cost of formulation A as a function of %s on [%g, %g]' % (args.parameter, args.lo, args.hi))
+    print('%12s %12s %16s %14s' % ('from', 'to', 'cost at from', 'slope'))
+    for segment in curve.segments:
+        print('%12.4f %12.4f %16.2f %14.4f' % (segment.lo, segment.hi, segment.value, segment.slope))
+    print('%d pieces from %d solves' % (len(curve.segments), curve.solves))
+    if not curve.complete:
+        print('TRUNCATED   : the solve limit was reached at %g, the curve stops short of %g'
+              % (curve.segments[-1].hi, args.hi))
+
+
+def dpCommand(args):
+    instance = _instance(args)
+    closed = None
+    if args.check:
+        try:
+            check = crossCheck(instance)
+        except gurobipy.GurobiError as error:
+            # e.g. the size limit of the pip license
+            print('cross-check skipped: %s' % error)
+        else:
+            closed = check['closed']
+            print('Gurobi      : %14.2f euro in %.4fs' % (check['gurobi']['objVal'], check['gurobi']['solveTime']))
+            if check['mismatch']:
+                print('MISMATCH    : %s (relative gap %.2e)' % (check['mismatch'], check['gap']))
+    if closed is None:
+        closed = solveContinuous(instance)
+    print('closed form : %14.2f euro in %.4fs' % (closed['objVal'], closed['solveTime']))
+    print('Total holding costs: %10.2f euro' % closed['holding'])
+    print('Total personnel costs: %10.2f euro' % closed['salary'])
+
+
+def _firstIncumbent(point):
+    # no MIPSOL callback fires on a time limit or when the start is already optimal
+    return '%9.3f' % point['firstIncumbent'] if point['firstIncumbent'] is not None else '%9s' % '-'
+
+
+def seedCommand(args):
+    print('%-8s %14s %9s %14s %9s %9s %7s %9s %9s %7s' % ('size', 'heuristic', 'heur s', 'optimum',
+          'cold s', 'cold 1st', 'nodes', 'seed s', 'seed 1st', 'nodes'))
+    params = {'Threads': args.threads} if args.threads else None
+    for size in args.sizes.split(','):
+        products, months = (int(part) for part in size.split('x'))
+        instance = baseInstance()
+        if (products, months) != (instance.nProducts, instance.nMonths):
+            instance = scaleInstance(instance, products, months)
+        plan, points = compareSeeding(instance, params)
+        cold, seeded = points['cold'], points['seeded']
+        coldFirst, seededFirst = (_firstIncumbent(point) for point in (cold, seeded))
+        print('%-8s %14.2f %9.4f %14.2f %9.3f %s %7d %9.3f %s %7d' % (
+            size, plan['objVal'], plan['buildTime'], seeded['objVal'], cold['runtime'], coldFirst,
+            cold['nodes'], seeded['runtime'], seededFirst, seeded['nodes']))
+
+
+def boundsCommand(args):
+    params = {'Threads': args.threads} if args.threads else None
+    print('%-8s %-10s %14s %10s %10s %7s %9s' % ('size', 'con5', 'optimum', 'LP gap %', 'root gap %', 'nodes',
+                                                 'solve s'))
+    for size in args.sizes.split(','):
+        products, months = (int(part) for part in size.split('x'))
+        instance = baseInstance()
+        if (products, months) != (instance.nProducts, instance.nMonths):
+            instance = scaleInstance(instance, products, months)
+        bounds, points = compareTightening(instance, params, args.cost)
+        for mode, point in points.items():
+            print('%-8s %-10s %14.2f %10.4f %10.4f %7d %9.3f' % (
+                size, mode, point['objVal'], 100 * point['lpGap'], 100 * point['rootGap'], point['nodes'],
+                point['solveTime']))
+        print('%-8s %-10s max workforce %d (%s), total fires %g, derived in %.4fs' % (
+            size, 'bounds', bounds['workforce'].max(), 'demand and cost' if bounds['costBased'] else 'demand',
+            bounds['totalFires'], bounds['boundTime']))
+
+
+def traceCommand(args):
+    traces = []
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    for size in args.sizes.split(',') if args.variants else []:
+        products, months = (int(part) for part in size.split('x'))
+        instance = baseInstance()
+        if (products, months) != (instance.nProducts, instance.nMonths):
+            instance = scaleInstance(instance, products, months)
+        for variant in args.variants:
+            built = buildMatrixModel(variant, instance)
+            path = os.path.join(args.output, '%s-%s.npz' % (variant, size)) if args.output else None
+            params = {'MIPGap': 0, 'OutputFlag': 0, 'TimeLimit': args.time_limit}
+            try:
+                traces.append(traceSolve(built, path, params, args.interval)[1])
+            finally:
+                built.model.dispose()
+    table = summarizeTraces(traces + args.read, args.gap)
+    columns = ['variant', 'products', 'months', 'status', 'objVal', 'nodes', 'events', 'firstIncumbent',
+               'timeToGap', 'timeToOptimal', 'timeToProof', 'finalGap', 'work']
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(table[columns].to_string(index=False, float_format='%.4f'))
+
+
+def tuneCommand(args):
+    if args.remove:
+        for formulation in args.formulations.split(','):
+            variant = FORMULATIONS[formulation][0]
+            print('profile of %s %s' % (variant, 'removed' if removeProfile(variant) else 'not found'))
+        return
+    sizes = [tuple(int(part) for part in size.split('x')) for size in args.sizes.split(',')]
+    for formulation in args.formulations.split(','):
+        quarterLength = FORMULATIONS[formulation][1]
+        report = tuneVariant(formulation, tuningInstances(sizes, range(args.seeds), quarterLength),
+                             tuningInstances(sizes, [args.seeds], quarterLength), args.trials, args.seed,
+                             args.time_limit, args.workers, save=not args.no_save)
+        with pd.option_context('display.width', 200, 'display.max_colwidth', 120):
+            print(report['table'].head(5).to_string(index=False))
+        print('%s: best %s' % (formulation, report['params'] or 'Gurobi defaults'))
+        for name in ('median', 'p95'):
+            print('  %-6s solve time %.4fs -> %.4fs, %+.1f %%' % (
+                name, report[name + 'Default'], report[name + 'Tuned'], 100 * report[name + 'Improvement']))
+        print('  %d trials on %d instances, validated on %d, %.1fs%s\n' % (
+            report['trials'], report['instances'], report['validation'], report['tuningTime'],
+            ', saved as the profile of %s' % report['variant'] if report['saved'] else ''))
+
+
+def rollingCommand(args):
+    params = {'Threads': args.threads} if args.threads else {}
+    if args.time_limit:
+        params['TimeLimit'] = args.time_limit
+    rolling, full = compareRolling(_instance(args), args.window, args.commit, params, full=not args.no_full)
+    print('%8s %8s %10s %8s %8s %9s' % ('from', 'to', 'committed', 'vars', 'nodes', 'solve s'))
+    for window in rolling['windows']:
+        print('%8d %8d %10d %8d %8d %9.3f' % (window['start'], window['stop'] - 1, window['committed'],
+                                             window['vars'], window['nodes'], window['solveTime']))
+    print('rolling horizon : %14.2f euro in %.3fs' % (rolling['objVal'], rolling['solveTime']))
+    if not rolling['certified']:
+        print('NOT CERTIFIED   : the committed plan fails %s' % ', '.join(rolling['failed']))
+    if full is not None and full['objVal'] is not None:
+        print('full horizon    : %14.2f euro in %.3fs (status %d)' % (full['objVal'], full['solveTime'],
+                                                                   full['status']))
+        print('difference      : %13.4f %%' % (100 * (rolling['objVal'] - full['objVal']) / full['objVal']))
+
+
+def stochasticCommand(args):
+    instance = _instance(args)
+    scenarios = demandScenarios(instance, args.scenarios, args.spread, args.seed)
+    result = solveStochastic(instance, scenarios, shortageCost=args.shortage_cost, workers=args.workers)
+    print('%9s %16s %16s %9s %9s' % ('iteration', 'lower', 'upper', 'master s', 'scen. s'))
+    for step in result['history']:
+        print('%9d %16.2f %16.2f %9.3f %9.3f' % (step['iteration'], step['lower'], step['upper'],
+                                                step['masterTime'], step['scenarioTime']))
+    print('\nworkforce per quarter: %s' % ' '.join('%d' % value for value in result['workforce']))
+    print('expected costs : %14.2f euro (salary %.2f, holding %.2f, shortage %.2f)' % (
+        result['objVal'], result['salary'], result['holding'], result['shortage']))
+    print('%d scenarios, %d iterations, gap %.2e, %.3fs' % (result['scenarios'], result['iterations'],
+                                                         result['gap'], result['solveTime']))
+    if args.extensive:
+        try:
+            extensive = extensiveForm(instance, scenarios, shortageCost=args.shortage_cost)
+        except gurobipy.GurobiError as error:
+            # e.g. too many scenarios for a size-limited license
+            print('extensive form skipped: %s' % error)
+        else:
+            print('extensive form : %14.2f euro, %d vars, %.3fs, workforce %s' % (
+                extensive['objVal'], extensive['vars'], extensive['solveTime'],
+                ' '.join('%d' % value for value in extensive['workforce'])))
+
+
+def benchCommand(args):
+    sizes = [tuple(int(part) for part in size.split('x')) for size in args.sizes.split(',')]
+    params = {'TimeLimit': args.time_limit}
+    if args.threads:
+        params['Threads'] = args.threads
+    table = runBenchmark(sizes, args.formulations.split(','), args.seed, params, args.workers,
+                         args.backends.split(','), args.phases, args.profile)
+    columns = ['formulation', 'backend', 'products', 'months', 'vars', 'constrs', 'buildTime', 'solveTime', 'nodes',
+               'peakRssMB', 'objVal', 'gap', 'optimal']
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(table[columns].to_string(index=False, float_format='%.3f'))
+    for row in table[table['error'].notna()].itertuples():
+        print('%s %dx%d: %s' % (row.formulation, row.products, row.months, row.error))
+    print('\n%d jobs in %.2fs' % (len(table), table.attrs['wallTime']))
+    if args.phases:
+        print()
+        print(phaseSummary(table).to_string(index=False, float_format='%.4f'))
+    for profile in table.attrs['profiles']:
+        print('tuned profile applied: %s' % profile)
+    if table['backend'].nunique() > 1:
+        print()
+        print(throughput(table).to_string(index=False, float_format='%.3f'))
+    if args.output:
+        writeBenchmark(table, args.output)
+    if args.baseline:
+        slower = compareBenchmarks(readBenchmark(args.baseline), table, args.factor)
+        print('%d regressions against %s' % (len(slower), args.baseline))
+        if len(slower):
+            print(slower.to_string(index=False, float_format='%.3f'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m planning')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('solve', help='solve one formulation and print the costs and tables')
+    command.add_argument('variant', choices=VARIANTS)
+    command.add_argument('tables', nargs='*', choices=[[]] + list(TABLES), metavar='table',
+                         help='any of %s' % ', '.join(TABLES))
+    command.add_argument('--annual', action='store_true', help='freeze the workforce per year')
+    command.add_argument('--backend', default='gurobi', choices=BACKENDS)
+    command.add_argument('--threads', type=int, default=0)
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=12)
+    command.add_argument('--snapshot', help='write the model, parameters and start to a run directory in this one')
+    command.add_argument('--profile', action='store_true', help='apply the saved tuned profile (see tune)')
+    command.set_defaults(run=solveCommand)
+
+    command = commands.add_parser('compare-builders', help='build time and memory of the loop and matrix builders')
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=12)
+    command.add_argument('--variants', nargs='*', choices=VARIANTS, default=list(VARIANTS), metavar='variant')
+    command.set_defaults(run=compareBuildersCommand)
+
+    command = commands.add_parser('sweep', help='run the Experiments_C&F&H sweeps on one resident model')
+    command.add_argument('experiments', nargs='*', choices=[[]] + list(EXPERIMENTS), metavar='experiment')
+    command.add_argument('--rebuild', action='store_true', help='rebuild the model for every point instead')
+    command.add_argument('--warm-start', action='store_true', help='pass each optimal plan as MIP start to the next point')
+    command.add_argument('--cold', action='store_true', help='reset the resident model before every point')
+    command.add_argument('--store', help='append every point to the Parquet dataset in this directory')
+    command.add_argument('--cache', help='reuse the solves cached in this directory')
+    command.add_argument('--snapshot', help='write every solved point to a run directory in this one')
+    command.add_argument('--phases', choices=('time', 'memory'), help='profile the phases of the points')
+    command.add_argument('--threads', type=int, default=0)
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=12)
+    command.add_argument('--profile', action='store_true', help='apply the saved tuned profile (see tune)')
+    command.set_defaults(run=sweepCommand)
+
+    command = commands.add_parser('phases', help='time and memory of every build, solve and report phase')
+    command.add_argument('variants', nargs='*', choices=[[]] + list(VARIANTS), metavar='variant')
+    command.add_argument('--sizes', default='3x12', help='comma separated products x months')
+    command.add_argument('--builders', default='loop,matrix', help='comma separated, loop and/or matrix')
+    command.add_argument('--repeat', type=int, default=1, help='runs per variant, builder and size')
+    command.add_argument('--write', action='store_true', help='write output.lp before solving as the scripts do')
+    command.add_argument('--no-report', action='store_true', help='skip formatting the cost lines and tables')
+    command.add_argument('--no-memory', action='store_true', help='only RSS deltas, without tracemalloc')
+    command.add_argument('--output', help='write one row per run and phase to this CSV file')
+    command.set_defaults(run=phasesCommand)
+
+    command = commands.add_parser('replay', help='solve snapshots again and compare with the recorded outcome')
+    command.add_argument('paths', nargs='+', help='snapshot directories or directories containing them')
+    command.add_argument('--repeat', type=int, default=1, help='solves per snapshot')
+    command.add_argument('--set', action='append', default=[], metavar='PARAM=VALUE',
+                         help='Gurobi parameter set after the saved ones, may be repeated')
+    command.add_argument('--threads', type=int, default=0)
+    command.add_argument('--output', help='write the table to this CSV file')
+    command.set_defaults(run=replayCommand)
+
+    command = commands.add_parser('scenarios', help='run a scenario file on a process pool')
+    command.add_argument('file', nargs='?', default=os.path.join('Varification_D', 'scenarios.json'))
+    command.add_argument('--workers', type=int, help='worker processes (default: cores / threads)')
+    command.add_argument('--threads', type=int, help='Gurobi threads per worker (default: 1)')
+    command.add_argument('--output', help='write the result table to this CSV file')
+    command.add_argument('--store', help='append the rows to the Parquet dataset in this directory')
+    command.add_argument('--cache', help='reuse the solves cached in this directory')
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=12)
+    command.add_argument('--profile', action='store_true', help='apply the saved tuned profile (see tune)')
+    command.set_defaults(run=scenariosCommand)
+
+    command = commands.add_parser('sensitivity', help='LP ranging, duals and reduced costs of formulation A')
+    command.add_argument('tables', nargs='*', default=['x', 'r', 'demand'], metavar='table',
+                         help='any of x, r, demand')
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=12)
+    command.set_defaults(run=sensitivityCommand)
+
+    command = commands.add_parser('whatif', help='apply what-if deltas to a resident model interactively')
+    command.add_argument('variant', nargs='?', default='C', choices=VARIANTS)
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=12)
+    command.add_argument('--profile', action='store_true', help='apply the saved tuned profile (see tune)')
+    command.set_defaults(run=whatifCommand)
+
+    command = commands.add_parser('curve', help='exact parametric cost curve of formulation A')
+    command.add_argument('parameter', help='e.g. workerCosts[0], holdingCosts[1] or demand[0,5]')
+    command.add_argument('lo', type=float)
+    command.add_argument('hi', type=float)
+    command.add_argument('--max-solves', type=int, default=10000, help='stop the curve after this many solves')
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=12)
+    command.set_defaults(run=curveCommand)
+
+    command = commands.add_parser('dp', help='solve formulation A without a solver')
+    command.add_argument('--check', action='store_true', help='also solve with Gurobi and compare')
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=12)
+    command.set_defaults(run=dpCommand)
+
+    command = commands.add_parser('seed', help='solve H cold and seeded with the constructive heuristic')
+    command.add_argument('--sizes', default='3x12,6x24,8x36', help='comma separated products x months')
+    command.add_argument('--threads', type=int, default=0)
+    command.set_defaults(run=seedCommand)
+
+    command = commands.add_parser('bounds', help='solve H with the big-M, with derived bounds and with indicators')
+    command.add_argument('--sizes', default='3x12,6x24,8x36', help='comma separated products x months')
+    command.add_argument('--cost', action='store_true', help='tighten the demand bounds by cost where possible')
+    command.add_argument('--threads', type=int, default=0)
+    command.set_defaults(run=boundsCommand)
+
+    command = commands.add_parser('trace', help='record incumbent, bound and gap over time and summarize traces')
+    command.add_argument('variants', nargs='*', choices=[[]] + list(VARIANTS), metavar='variant')
+    command.add_argument('--sizes', default='3x12', help='comma separated products x months')
+    command.add_argument('--output', help='write one trace file per solve to this directory')
+    command.add_argument('--read', nargs='*', default=[], help='trace files or directories to summarize')
+    command.add_argument('--gap', type=float, default=0.01, help='gap for timeToGap')
+    command.add_argument('--interval', type=float, default=0.05, help='seconds between MIP progress samples')
+    command.add_argument('--time-limit', type=float, default=60, help='Gurobi TimeLimit per solve')
+    command.set_defaults(run=traceCommand)
+
+    command = commands.add_parser('tune', help='search Gurobi parameters per formulation and save the profiles',
+                                  description='Profiles are saved in %s (PLANNING_PROFILES); commands apply them '
+                                              'with --profile.' % profilePath())
+    command.add_argument('--formulations', default='C,F,H', help='comma separated, any of %s' % ', '.join(FORMULATIONS))
+    command.add_argument('--sizes', default='3x12,3x24,5x24', help='comma separated products x months')
+    command.add_argument('--seeds', type=int, default=2, help='instances per size to tune on, one more validates')
+    command.add_argument('--trials', type=int, default=20, help='random settings besides the defaults')
+    command.add_argument('--seed', type=int, default=0, help='seed of the random settings')
+    command.add_argument('--time-limit', type=float, default=30, help='Gurobi TimeLimit per solve')
+    command.add_argument('--workers', type=int, default=1, help='trials at the same time')
+    command.add_argument('--no-save', action='store_true', help='only report, keep the saved profiles')
+    command.add_argument('--remove', action='store_true', help='remove the saved profiles of the formulations')
+    command.set_defaults(run=tuneCommand)
+
+    command = commands.add_parser('rolling', help='solve H over a long horizon in overlapping windows')
+    command.add_argument('--window', type=int, default=18, help='months solved per window')
+    command.add_argument('--commit', type=int, default=6, help='months committed per window')
+    command.add_argument('--no-full', action='store_true', help='skip the full-horizon solve')
+    command.add_argument('--time-limit', type=float, default=0, help='Gurobi TimeLimit per solve')
+    command.add_argument('--threads', type=int, default=0)
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=60)
+    command.set_defaults(run=rollingCommand)
+
+    command = commands.add_parser('stress', help='Monte Carlo stress test of an optimal plan against demand noise')
+    command.add_argument('variant', nargs='?', default='C', choices=VARIANTS)
+    command.add_argument('--paths', type=int, default=100000, help='number of demand paths')
+    command.add_argument('--spread', type=float, default=0.2, help='standard deviation of log demand')
+    command.add_argument('--chunk', type=int, default=10000, help='paths simulated at once')
+    command.add_argument('--seed', type=int, default=0)
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=12)
+    command.set_defaults(run=stressCommand)
+
+    command = commands.add_parser('stochastic', help='two-stage model C over demand scenarios, by Benders')
+    command.add_argument('--scenarios', type=int, default=1000, help='number of demand scenarios')
+    command.add_argument('--spread', type=float, default=0.2, help='standard deviation of log demand')
+    command.add_argument('--shortage-cost', type=float, default=1000.0, help='euro per unit of unmet demand')
+    command.add_argument('--seed', type=int, default=0)
+    command.add_argument('--workers', type=int, default=1, help='processes solving the scenario LPs')
+    command.add_argument('--extensive', action='store_true', help='also solve the extensive form to compare')
+    command.add_argument('--products', type=int, default=3)
+    command.add_argument('--months', type=int, default=12)
+    command.set_defaults(run=stochasticCommand)
+
+    command = commands.add_parser('bench', help='build and solve all formulations on synthetic instances')
+    command.add_argument('--sizes', default='3x12,6x24,10x24', help='comma separated products x months')
+    command.add_argument('--time-limit', type=float, default=60, help='Gurobi TimeLimit per job')
+    command.add_argument('--formulations', default=','.join(FORMULATIONS))
+    command.add_argument('--backends', default='gurobi', help='comma separated, any of %s' % ', '.join(BACKENDS))
+    command.add_argument('--seed', type=int, default=0)
+    command.add_argument('--threads', type=int, default=0, help='solver threads per job (default: 1)')
+    command.add_argument('--workers', type=int, default=1, help='jobs run at the same time')
+    command.add_argument('--output', help='write the rows to this .csv or .json file')
+    command.add_argument('--baseline', help='earlier output to check for regressions')
+    command.add_argument('--factor', type=float, default=1.5, help='slowdown that counts as a regression')
+    command.add_argument('--phases', choices=('time', 'memory'),
+                         help='add the time (and Python memory) of every build and solve phase to the rows')
+    command.add_argument('--profile', action='store_true', help='apply the saved tuned profile (see tune)')
+    command.set_defaults(run=benchCommand)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
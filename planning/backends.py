@@ -0,0 +1,148 @@
+# Products Manufacturing with lowest cost
+# Solver backends: solve a built model with Gurobi or with HiGHS
+#
+# The builders create Gurobi models, which needs no license; only solving
+# is limited by the size-restricted pip license.  The HiGHS backend reads
+# the built model as arrays (objective, sparse rows, bounds, integrality)
+# and solves it with highspy instead.  Both return a SolveResult
+# (planning.results) with the Gurobi status codes and the values of every
+# variable family.
+
+
+import time
+
+import numpy as np
+from gurobipy import GRB
+
+from .builder import modelArrays
+from .phases import NO_PROFILER
+from .results import SolveResult
+
+try:
+    import highspy
+except ImportError:        # HiGHS is optional
+    highspy = None
+
+
+BACKENDS = ('gurobi', 'highs')
+
+
+def _families(built, solution):
+    # values of each variable family, in the shape of its MVar
+    values = {}
+    for name, var in built.vars.items():
+        index = np.array([column.index for column in np.ravel(var.tolist())])
+        values[name] = solution[index].reshape(var.shape)
+    return values
+
+
+# ----- Gurobi -----
+
+def solveGurobi(built, params=None, profiler=None):
+    phase = (profiler or NO_PROFILER).phase
+    model = built.model
+    for name, value in (params or {}).items():
+        model.setParam(name, value)
+    start = time.perf_counter()
+    with phase('optimize'):
+        model.optimize()
+    solveTime = time.perf_counter() - start
+    with phase('extract'):
+        return SolveResult.fromModel(built, solveTime)
+
+
+# ----- HiGHS -----
+
+# Gurobi parameter: (HiGHS option, conversion)
+HIGHS_OPTIONS = {'TimeLimit': ('time_limit', float), 'MIPGap': ('mip_rel_gap', float),
+                 'Threads': ('threads', int), 'OutputFlag': ('output_flag', bool)}
+
+if highspy is not None:
+    _HIGHS_STATUS = {highspy.HighsModelStatus.kOptimal: GRB.OPTIMAL,
+                     highspy.HighsModelStatus.kInfeasible: GRB.INFEASIBLE,
+                     highspy.HighsModelStatus.kUnbounded: GRB.UNBOUNDED,
+                     highspy.HighsModelStatus.kUnboundedOrInfeasible: GRB.INF_OR_UNBD,
+                     highspy.HighsModelStatus.kTimeLimit: GRB.TIME_LIMIT,
+                     highspy.HighsModelStatus.kIterationLimit: GRB.ITERATION_LIMIT,
+                     highspy.HighsModelStatus.kSolutionLimit: GRB.SOLUTION_LIMIT,
+                     highspy.HighsModelStatus.kInterrupt: GRB.INTERRUPTED,
+                     highspy.HighsModelStatus.kMemoryLimit: GRB.MEM_LIMIT}
+
+
+def highsModel(built):
+    """The built model as a highspy.HighsLp."""
+    if highspy is None:
+        raise RuntimeError('the HiGHS backend needs highspy (pip install highspy)')
+    arrays = modelArrays(built.model)
+    A = arrays['A'].tocsc()
+    rhs, sense = arrays['RHS'], arrays['Sense']
+    infinity = highspy.kHighsInf
+
+    lp = highspy.HighsLp()
+    lp.num_col_, lp.num_row_ = A.shape[1], A.shape[0]
+    lp.col_cost_ = arrays['Obj']
+    lp.offset_ = built.model.ObjCon
+    lp.col_lower_ = np.maximum(arrays['LB'], -infinity)
+    lp.col_upper_ = np.minimum(arrays['UB'], infinity)
+    lp.row_lower_ = np.where(sense == '<', -infinity, rhs)
+    lp.row_upper_ = np.where(sense == '>', infinity, rhs)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_ = A.indptr
+    lp.a_matrix_.index_ = A.indices
+    lp.a_matrix_.value_ = A.data
+    integer = np.isin(arrays['VType'], ('B', 'I'))
+    if integer.any():
+        lp.integrality_ = [highspy.HighsVarType.kInteger if flag else highspy.HighsVarType.kContinuous
+                           for flag in integer]
+    lp.sense_ = highspy.ObjSense.kMinimize if built.model.ModelSense == GRB.MINIMIZE else \
+        highspy.ObjSense.kMaximize
+    return lp
+
+
+def solveHighs(built, params=None, profiler=None):
+    phase = (profiler or NO_PROFILER).phase
+    with phase('convert'):
+        lp = highsModel(built)
+    highs = highspy.Highs()
+    highs.setOptionValue('output_flag', False)
+    for name, value in (params or {}).items():
+        if name not in HIGHS_OPTIONS:
+            raise ValueError('parameter %s has no HiGHS equivalent, expected one of %s'
+                             % (name, ', '.join(HIGHS_OPTIONS)))
+        option, convert = HIGHS_OPTIONS[name]
+        highs.setOptionValue(option, convert(value))
+    with phase('convert'):
+        highs.passModel(lp)
+    start = time.perf_counter()
+    with phase('optimize'):
+        highs.run()
+    solveTime = time.perf_counter() - start
+
+    status = highs.getModelStatus()
+    info = highs.getInfo()
+    mip = built.model.IsMIP
+    result = SolveResult('highs', _HIGHS_STATUS.get(status, GRB.INTERRUPTED), solveTime=solveTime,
+                         nodes=int(info.mip_node_count) if mip else 0, message=highs.modelStatusToString(status),
+                         instance=built.instance, variant=built.variant, profile=built.profile,
+                         hireLimit=built.hireLimits())
+    if info.primal_solution_status == highspy.kSolutionStatusFeasible:
+        with phase('extract'):
+            result.objVal = info.objective_function_value
+            result.gap = info.mip_gap if mip else 0.0
+            result.values = _families(built, np.array(highs.getSolution().col_value))
+    return result
+
+
+SOLVERS = {'gurobi': solveGurobi, 'highs': solveHighs}
+
+
+def solve(built, backend='gurobi', params=None, profiler=None):
+    """Solve a built model with ``backend`` and return a SolveResult.
+
+    ``params`` are Gurobi parameter names; for HiGHS TimeLimit, MIPGap,
+    Threads and OutputFlag are translated.  A PhaseProfiler ``profiler``
+    times optimize and extract (and the conversion for HiGHS) separately.
+    """
+    if backend not in SOLVERS:
+        raise ValueError('unknown backend %r, expected one of %s' % (backend, ', '.join(BACKENDS)))
+    return SOLVERS[backend](built, params, profiler)
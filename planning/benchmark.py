@@ -0,0 +1,152 @@
+# Products Manufacturing with lowest cost
+# Scaling benchmark of the A/C/F/H formulations on synthetic instances
+#
+#   A       continuous workers                    (Implement_A.py)
+#   C       workforce frozen per quarter          (Implement_C.py)
+#   F       C plus firing cost                    (Implementation_F.py)
+#   H       hire/fire with contracts              (Implementation_H.py)
+#   annual  C with the workforce frozen per year  (Time_Plots_Annually.py)
+#
+# Every (formulation, size, backend) job runs in a fresh worker process, so
+# the peak resident set size of the process is the peak of that job.  The
+# rows are written as CSV (or JSON records), throughput sums them up per
+# backend and compareBenchmarks flags the jobs of a new run that got slower
+# or changed their objective.
+
+
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+
+import gurobipy
+import numpy as np
+import pandas as pd
+from gurobipy import GRB
+
+from .backends import solve
+from .builder import buildMatrixModel
+from .instance import syntheticInstance
+from .phases import PhaseProfiler
+
+
+# label: (formulation, quarterLength)
+FORMULATIONS = {'A': ('A', 3), 'C': ('C', 3), 'F': ('F', 3), 'H': ('H', 3), 'annual': ('C', 12)}
+
+SIZES = ((3, 12), (6, 24), (10, 24))
+
+
+def _peakRssBytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def benchmarkJob(job):
+    """Build and solve one job and return its row; runs in a worker process."""
+    variant, quarterLength = FORMULATIONS[job['formulation']]
+    instance = syntheticInstance(job['products'], job['months'], job['seed'], quarterLength=quarterLength)
+    row = dict(job, status=None, objVal=None, gap=None, nodes=None, solveTime=None, error=None)
+    profiler = PhaseProfiler(job['phases'] == 'memory') if job['phases'] else None
+    built = buildMatrixModel(variant, instance, profiler=profiler, profile=job['profile'])
+    model = built.model
+    row.update(vars=model.NumVars, constrs=model.NumConstrs, nonzeros=model.NumNZs, buildTime=built.buildTime,
+               profile=json.dumps(built.profile, sort_keys=True) if built.profile is not None else None)
+    try:
+        result = solve(built, job['backend'], dict({'MIPGap': 0}, **job['params']), profiler)
+        row.update(status=result.status, solveTime=result.solveTime, nodes=result.nodes, objVal=result.objVal,
+                   gap=result.gap)
+    except gurobipy.GurobiError as error:
+        # e.g. the size limit of the pip license
+        row['error'] = str(error)
+    finally:
+        model.dispose()
+    row['peakRssMB'] = _peakRssBytes() / 2**20
+    if profiler is not None:
+        profiler.close()
+        row.update(profiler.columns())
+    return row
+
+
+def runBenchmark(sizes=SIZES, formulations=tuple(FORMULATIONS), seed=0, params=None, workers=1,
+                 backends=('gurobi',), phases=None, profile=False):
+    """Run every formulation on every (products, months) size with every backend and return the rows.
+
+    Each solve gets one thread and 60 seconds unless ``params`` says
+    otherwise; ``gap`` tells how far a stopped MIP was from optimal.
+    ``workers`` jobs run at the same time, keep the default 1 for timings
+    that can be compared between runs.  With ``phases`` 'time' every row
+    also gets the seconds and RSS delta of each build and solve phase
+    (``<phase>Time``, ``<phase>RssMB``, see planning.phases), with 'memory'
+    the peak Python allocations ``<phase>PeakMB`` too, which slows the
+    build down.  With ``profile`` the saved profiles are applied and the
+    ``profile`` column holds the parameters of each row.
+    """
+    for name in formulations:
+        if name not in FORMULATIONS:
+            raise ValueError('unknown formulation %r, expected one of %s' % (name, ', '.join(FORMULATIONS)))
+    params = dict({'Threads': 1, 'TimeLimit': 60}, **(params or {}), OutputFlag=0)
+    jobs = [{'formulation': name, 'products': products, 'months': months, 'seed': seed, 'backend': backend,
+             'params': params, 'phases': phases, 'profile': profile}
+            for products, months in sizes for name in formulations for backend in backends]
+    start = time.perf_counter()
+    # a new process per job, so that ru_maxrss is the peak of that job
+    with multiprocessing.Pool(workers, maxtasksperchild=1) as pool:
+        rows = pool.map(benchmarkJob, jobs, chunksize=1)
+    table = pd.DataFrame(rows).drop(columns=['params', 'phases'])
+    table['optimal'] = table['status'] == GRB.OPTIMAL
+    table.attrs.update(wallTime=time.perf_counter() - start, gurobi='.'.join(map(str, gurobipy.gurobi.version())),
+                       python=platform.python_version(), machine=platform.machine(), params=params,
+                       profiles=sorted(set(table['profile'].dropna())))
+    return table
+
+
+def throughput(table):
+    """Jobs, optimal solves, total solve time and solves per second per backend and formulation."""
+    solved = table.assign(optimal=table['optimal'].astype(int), solveTime=table['solveTime'].fillna(0.0))
+    summary = solved.groupby(['backend', 'formulation'], sort=False).agg(
+        jobs=('optimal', 'size'), optimal=('optimal', 'sum'), solveTime=('solveTime', 'sum'))
+    summary['solvesPerSecond'] = summary['optimal'] / summary['solveTime'].where(summary['solveTime'] > 0)
+    return summary.reset_index()
+
+
+def writeBenchmark(table, path):
+    """Write ``table`` as JSON records when ``path`` ends in .json, else as CSV."""
+    if path.endswith('.json'):
+        table.to_json(path, orient='records', indent=1)
+    else:
+        table.to_csv(path, index=False)
+
+
+def readBenchmark(path):
+    return pd.read_json(path, orient='records') if path.endswith('.json') else pd.read_csv(path)
+
+
+def compareBenchmarks(baseline, current, factor=1.5, minTime=0.05, tol=1e-6):
+    """Jobs of ``current`` that are ``factor`` times slower than in ``baseline`` or changed their objective.
+
+    Times below ``minTime`` seconds are too noisy to compare.
+    """
+    keys = ['formulation', 'products', 'months', 'seed', 'backend']
+    if 'backend' not in baseline:
+        baseline = baseline.assign(backend='gurobi')
+    merged = baseline.merge(current, on=keys, suffixes=('Before', ''))
+    flags = pd.Series(False, index=merged.index)
+    for column in ('buildTime', 'solveTime'):
+        before, after = merged[column + 'Before'], merged[column]
+        flags |= (after > factor * before) & (after > minTime)
+    before, after = merged['objValBefore'], merged['objVal']
+    flags |= ~np.isclose(before, after, rtol=tol, equal_nan=True)
+    return merged.loc[flags, keys + ['buildTimeBefore', 'buildTime', 'solveTimeBefore', 'solveTime',
+                                     'objValBefore', 'objVal']]
+
+
+def phaseSummary(table):
+    """Mean seconds and share of every phase per formulation and backend of a benchmark run with phases."""
+    phases = [column[:-len('Time')] for column in table if column.endswith('Time') and
+              column[:-len('Time')] + 'RssMB' in table]
+    summary = table.groupby(['backend', 'formulation'], sort=False)[[phase + 'Time' for phase in phases]].mean()
+    summary.columns = phases
+    shares = summary.div(summary.sum(axis=1), axis=0)
+    return pd.concat({'seconds': summary, 'share': shares}, axis=1).reset_index()
@@ -0,0 +1,187 @@
+# Products Manufacturing with lowest cost
+# Data-derived bounds that replace the big-M of formulation H
+#
+# In Implementation_H.py con5 reads sum_i n[i,k] <= 1000000 * a[k] and x, n,
+# m, b have no upper bounds, so the LP relaxation pays a millionth of the
+# training cost per hire.  deriveBounds computes bounds from the data:
+#
+#   - product i never needs more than ceil(D[i] / prodCapability[i])
+#     workers in a month, D[i] being its cumulative demand over the horizon
+#     plus the storage minimum (the largest cumulative requirement), since
+#     they would make more than the whole horizon needs in that month.
+#     Workers move freely between the types, so the workforce W[k] =
+#     sum_i x[i,k] and every x[i,k] are bounded by the sum over the types,
+#   - hires, the fireable pool and fires are bounded by the workforce
+#     through con2 and con3,
+#   - with ``costBased`` the workforce bound is tightened further by cost:
+#     W[k] is paid workerCosts[k] each, and the rest of any plan costs at
+#     least the optimum of the continuous model A with month k made free
+#     (solveContinuous) plus the first training, so for every plan at least
+#     as cheap as a known incumbent
+#         W[k] <= (incumbent - A_free_k - trainingCost) / workerCosts[k]
+#     and all firings together cost at most incumbent - A - trainingCost.
+#     This needs one closed-form solve per month and is skipped where the
+#     closed form does not apply (a storage minimum, negative demand).
+#
+# The demand bound depends on demand, the storage minimum and prodCapability
+# and the cost bound on the costs; recompute them after changing the data.
+
+
+import time
+
+import numpy as np
+from gurobipy import GRB
+
+from .builder import buildMatrixModel
+from .dp import solveContinuous
+from .heuristic import constructHirePlan
+from .instance import baseInstance
+
+
+def _floor(value):
+    return np.floor(np.asarray(value, dtype=float) + 1e-9)
+
+
+def demandBounds(instance):
+    """Workers per product type that can make its whole cumulative requirement in one month."""
+    storageMin = np.broadcast_to(instance.storageMin, instance.demand.shape)
+    required = np.maximum((np.cumsum(instance.demand, axis=1) + storageMin).max(axis=1), 0.0)
+    return np.ceil(required / instance.prodCapability - 1e-9)
+
+
+def _costBounds(instance, incumbent):
+    # workforce per month and total fires of every plan as cheap as ``incumbent``; None without closed form
+    nK = instance.nMonths
+    try:
+        continuous = solveContinuous(instance)['objVal']
+    except ValueError:
+        return None
+    if incumbent is None:
+        incumbent = constructHirePlan(instance)['objVal']
+    # the first month needs workers, and nobody is employed before it
+    training = instance.trainingCost if (instance.demand[:, 0] > 0).any() else 0.0
+    lower = continuous + training
+    slack = np.empty(nK)
+    for k in range(nK):
+        workerCosts = instance.workerCosts.copy()
+        workerCosts[k] = 0.0
+        slack[k] = incumbent - solveContinuous(instance.copy(workerCosts=workerCosts))['objVal'] - training
+    with np.errstate(divide='ignore'):
+        workforce = np.where(instance.workerCosts > 0, _floor(slack / instance.workerCosts), np.inf)
+    totalFires = _floor((incumbent - lower) / instance.firingCost) if instance.firingCost > 0 else np.inf
+    return np.maximum(workforce, 0.0), max(float(totalFires), 0.0), float(incumbent), float(lower)
+
+
+def deriveBounds(instance=None, incumbent=None, costBased=False):
+    """Upper bounds on the workforce, hires, fireable pool and fires of H per month.
+
+    The bounds follow from the cumulative demand and prodCapability; with
+    ``costBased`` they are tightened by comparing ``incumbent``, the cost of
+    any feasible plan (by default the one of constructHirePlan), with the
+    continuous model.  Returns a dict of arrays of length months
+    (workforce, hires, eligible, fires), the demand bound per product, the
+    total fires bound and, when the cost bound was applied, the two costs
+    used.
+    """
+    instance = instance if instance is not None else baseInstance()
+    start = time.perf_counter()
+    nK, contract = instance.nMonths, instance.contractPeriods
+    perProduct = demandBounds(instance)
+    workforce = np.full(nK, perProduct.sum())
+    totalFires, incumbentCost, lower = np.inf, None, None
+    costs = _costBounds(instance, incumbent) if costBased else None
+    if costs is not None:
+        costWorkforce, totalFires, incumbentCost, lower = costs
+        workforce = np.minimum(workforce, costWorkforce)
+
+    before = np.concatenate([[0.0], workforce[:-1]])
+    ended = np.arange(nK) >= contract
+    # n[k] = W[k] - W[k-1] + b[k] <= W[k]: hiring and firing in one month only costs
+    hires = workforce
+    if contract > 0:
+        # m[k] = hires up to k-contract - fires up to k-1 <= W[k-1], so b <= W[k-1]
+        eligible = np.where(ended, before, 0.0)
+    else:
+        # hires of this month are fireable at once: m[k] = W[k-1] + n[k]
+        eligible = before + hires
+    fires = np.minimum(eligible, totalFires)
+    return {'workforce': workforce, 'hires': hires, 'eligible': eligible, 'fires': fires,
+            'perProduct': perProduct, 'totalFires': totalFires, 'costBased': costs is not None,
+            'incumbent': incumbentCost, 'lower': lower, 'boundTime': time.perf_counter() - start}
+
+
+def tightenModel(built, bounds=None, indicator=False):
+    """Apply ``bounds`` to the integer variables of a built H model and drop the big-M.
+
+    con5 gets the hire bound of each month as coefficient of a[k], or with
+    ``indicator`` is replaced by the indicator constraints a[k] = 0 ->
+    sum_i n[i,k] <= 0.
+    """
+    if built.variant != 'H':
+        raise ValueError('bound tightening is for formulation H, not %s' % built.variant)
+    bounds = bounds if bounds is not None else deriveBounds(built.instance)
+    model, vars = built.model, built.vars
+    shape = vars['x'].shape
+    for name, key in (('x', 'workforce'), ('n', 'hires'), ('m', 'eligible'), ('b', 'fires')):
+        vars[name].UB = np.broadcast_to(np.minimum(bounds[key], GRB.INFINITY), shape)
+
+    a, con5 = vars['a'], built.constrs['con5']
+    if indicator:
+        model.remove(con5)
+        built.constrs['con5'] = [model.addConstr((a[k] == 0) >> (vars['n'][:, k].sum() <= 0), name='con5[%d]' % k)
+                                 for k in built.instance.K]
+    else:
+        for row, column, bigM in zip(con5.tolist(), a.tolist(), bounds['hires']):
+            model.chgCoeff(row, column, -min(bigM, GRB.INFINITY))
+    model.update()
+    return built
+
+
+def _solve(built, params):
+    # optimize and record the LP relaxation, the root bound after cuts and the tree size
+    model = built.model
+    relaxed = model.relax()
+    relaxed.setParam('OutputFlag', 0)
+    relaxed.optimize()
+    lpBound = relaxed.ObjVal if relaxed.Status == GRB.OPTIMAL else None
+    relaxed.dispose()
+
+    root = []
+
+    def callback(model, where):
+        if where == GRB.Callback.MIPNODE and model.cbGet(GRB.Callback.MIPNODE_NODCNT) == 0:
+            root[:] = [model.cbGet(GRB.Callback.MIPNODE_OBJBND)]
+
+    model.setParam('MIPGap', 0)
+    for name, value in (params or {}).items():
+        model.setParam(name, value)
+    start = time.perf_counter()
+    model.optimize(callback)
+    point = {'status': model.Status, 'solveTime': time.perf_counter() - start, 'nodes': model.NodeCount,
+             'objVal': model.ObjVal if model.Status == GRB.OPTIMAL else None,
+             'lpBound': lpBound, 'rootBound': root[0] if root else None}
+    for name in ('lp', 'root'):
+        bound = point[name + 'Bound']
+        point[name + 'Gap'] = None if bound is None or point['objVal'] is None else \
+            (point['objVal'] - bound) / max(1.0, abs(point['objVal']))
+    return point
+
+
+def compareTightening(instance=None, params=None, costBased=False):
+    """Solve H as in the script, with derived big-M coefficients and with indicators.
+
+    Returns the bounds (see deriveBounds for ``costBased``) and one point
+    per mode with LP and root gaps, nodes and solve time.
+    """
+    instance = instance if instance is not None else baseInstance()
+    bounds = deriveBounds(instance, costBased=costBased)
+    points = {}
+    for mode in ('bigM', 'derived', 'indicator'):
+        built = buildMatrixModel('H', instance.copy())
+        try:
+            if mode != 'bigM':
+                tightenModel(built, bounds, indicator=mode == 'indicator')
+            points[mode] = _solve(built, dict(params or {}, OutputFlag=0))
+        finally:
+            built.model.dispose()
+    return bounds, points
@@ -0,0 +1,511 @@
+# Products Manufacturing with lowest cost
+# Model builders for the A/C/F/H formulations
+#
+#   A  continuous workers, inventory balance only          (Implement_A.py)
+#   C  integer workers, workforce frozen within a quarter   (Implement_C.py)
+#   F  C plus firing cost at the arrangement moments        (Implementation_F.py)
+#   H  monthly hire/fire with contracts and training        (Implementation_H.py)
+#
+# buildLoopModel reproduces the scripts one addVar/addConstr at a time.
+# buildMatrixModel creates the same model from matrix variables and sparse
+# constraint blocks, which is what the rest of the package builds on.
+#
+# In F and H the scripts add every aggregate row (a sum over all products)
+# once per product, so |I|-1 of every |I| such rows are copies.  The matrix
+# builder adds each of them once; lintModel removes the copies from a loop
+# built model, after which both are identical.
+
+
+import time
+import tracemalloc
+
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB, Constr, Model, quicksum
+
+from .instance import baseInstance
+from .lint import lintModel
+from .phases import NO_PROFILER, rssBytes
+from .profiles import profileParams
+
+
+VARIANTS = ('A', 'C', 'F', 'H')
+
+# coefficient of the training indicator in con5 of Implementation_H.py
+bigM = 1000000
+
+
+class PlanningModel:
+    """A built Gurobi model together with its variable and constraint handles.
+
+    ``vars`` and ``constrs`` map the names used in the scripts (x, r, v, n, m,
+    b, a and con1, con2, ...) to MVar/MConstr objects for the matrix builder
+    and to dicts keyed like the scripts for the loop builder.  ``profile``
+    holds the tuned parameters applied to the model, None without a profile.
+    """
+
+    def __init__(self, variant, instance, model, vars, constrs, buildTime, profile=None):
+        self.variant = variant
+        self.instance = instance
+        self.model = model
+        self.vars = vars
+        self.constrs = constrs
+        self.buildTime = buildTime
+        self.profile = profile
+
+    def __getitem__(self, name):
+        return self.vars[name]
+
+    def hireLimits(self):
+        """Coefficient of a[k] in con5 per month as the model has it now, None for A, C and F.
+
+        bigM as built, the derived hire bounds after tightenModel and inf
+        where con5 is an indicator constraint.
+        """
+        if self.variant != 'H':
+            return None
+        con5, a = self.constrs['con5'], self.vars['a']
+        if isinstance(con5, dict):
+            rows, columns = [con5[k] for k in self.instance.K], [a[k] for k in self.instance.K]
+        else:
+            # an MConstr, or the list of indicator constraints of tightenModel
+            rows, columns = (con5.tolist() if hasattr(con5, 'tolist') else con5), a.tolist()
+        self.model.update()
+        return np.array([-self.model.getCoeff(row, column) if isinstance(row, Constr) else np.inf
+                         for row, column in zip(rows, columns)])
+
+    def __repr__(self):
+        return '<PlanningModel %s %s: %d vars, %d constrs, built in %.3fs>' % (
+            self.variant, self.instance.name, self.model.NumVars, self.model.NumConstrs, self.buildTime)
+
+
+def _checkVariant(variant):
+    if variant not in VARIANTS:
+        raise ValueError('unknown formulation %r, expected one of %s' % (variant, ', '.join(VARIANTS)))
+
+
+def _newModel(output, variant, profile=False):
+    # returns the model and the profile parameters applied to it, None without ``profile``
+    model = Model("ProductsManufactuing")
+    model.setParam('OutputFlag', output)  # silencing gurobi output or not
+    if not profile:
+        return model, None
+    # the tuned parameters of the formulation, see planning.tuning
+    params = profileParams(variant)
+    for name, value in params.items():
+        model.setParam(name, value)
+    return model, params
+
+
+# ----- loop builder (the original scripts) -----
+
+def buildLoopModel(variant, instance=None, output=False, profiler=None, profile=False):
+    """Build ``variant`` exactly as the scripts do, one variable at a time.
+
+    A PhaseProfiler ``profiler`` times the addVar loops, the update() calls
+    the scripts make after every variable family, the objective and the
+    constraint families separately (planning.phases).  With ``profile`` the
+    saved profile of the formulation is applied (planning.profiles).
+    """
+    _checkVariant(variant)
+    phase = (profiler or NO_PROFILER).phase
+    instance = instance if instance is not None else baseInstance()
+    start = time.perf_counter()
+
+    model, applied = _newModel(output, variant, profile)
+    vars = _loopVariables(model, variant, instance, phase)
+    with phase('objective'):
+        _loopObjective(model, variant, instance, vars)
+    with phase('constraints'):
+        constrs = _loopConstraints(model, variant, instance, vars)
+    with phase('update'):
+        model.update()
+    return PlanningModel(variant, instance, model, vars, constrs, time.perf_counter() - start, applied)
+
+
+def _loopVariables(model, variant, instance, phase):
+    storageMin = np.broadcast_to(instance.storageMin, instance.demand.shape)
+    I, K, S = instance.I, instance.K, instance.S
+    integer = GRB.CONTINUOUS if variant == 'A' else GRB.INTEGER
+    vars = {}
+
+    # ----- Variables -----
+
+    with phase('variables'):
+        x = {}
+        for i in I:
+            for k in K:
+                x[i,k] = model.addVar(lb = 0, vtype = integer, name = 'X[' + str(i) + ',' + str(k) + ']')
+    with phase('update'):
+        model.update ()
+
+    with phase('variables'):
+        r = {}
+        for i in I:
+            for k in K:
+                r[i,k] = model.addVar(lb = storageMin[i,k], vtype = GRB.CONTINUOUS, name = 'R[' + str(i) + ',' + str(k) + ']')
+    with phase('update'):
+        model.update ()
+    vars['x'], vars['r'] = x, r
+
+    if variant == 'F':
+        v = {}
+        for i in I:
+            with phase('variables'):
+                for s in S:
+                    v[i,s] = model.addVar(lb = 0, vtype = GRB.INTEGER, name = 'V[' + str(i) + str(s) + ']')
+            with phase('update'):
+                model.update ()
+        vars['v'] = v
+
+    if variant == 'H':
+        for name in ('n', 'm', 'b'):
+            family = {}
+            with phase('variables'):
+                for i in I:
+                    for k in K:
+                        family[i,k] = model.addVar(lb = 0, vtype = GRB.INTEGER,
+                                                   name = name.upper() + '[' + str(i) + ',' + str(k) + ']')
+            with phase('update'):
+                model.update ()
+            vars[name] = family
+
+        with phase('variables'):
+            a = {}
+            for k in K:
+                a[k] = model.addVar(lb = 0, vtype = GRB.BINARY, name = 'A[' + str(k) + ']')
+        with phase('update'):
+            model.update ()
+        vars['a'] = a
+    return vars
+
+
+def _loopObjective(model, variant, instance, vars):
+    holdingCosts, workerCosts = instance.holdingCosts, instance.workerCosts
+    firingCost, trainingCost = instance.firingCost, instance.trainingCost
+    I, K, S = instance.I, instance.K, instance.S
+    x, r, v, b, a = (vars.get(name) for name in ('x', 'r', 'v', 'b', 'a'))
+
+    # ---- Objective Function ----
+
+    objective = quicksum((r[i,k] * holdingCosts[i] + workerCosts[k] * x[i,k]) for i in I for k in K)
+    if variant == 'F':
+        objective += quicksum((firingCost * v[i,s] for i in I for s in S))
+    if variant == 'H':
+        objective += quicksum(firingCost * b[i,k] for i in I for k in K) + quicksum(trainingCost * a[k] for k in K)
+    model.setObjective(objective)
+    model.modelSense = GRB.MINIMIZE
+    model.update()
+
+
+def _loopConstraints(model, variant, instance, vars):
+    prodCapability, demand = instance.prodCapability, instance.demand
+    contractPeriods = instance.contractPeriods
+    I, K, S = instance.I, instance.K, instance.S
+    x, r, v, n, m, b, a = (vars.get(name) for name in ('x', 'r', 'v', 'n', 'm', 'b', 'a'))
+    constrs = {}
+
+    # ---- Constraints ----
+
+    con1 = {}
+    for i in I:
+        for k in K:
+            if k == 0:
+                con1[i,k] = model.addConstr(r[i,k] == prodCapability[i] * x[i,k] - demand[i][k],
+                                            'con1[' + str(i) + ',' + str(k) + ']-')
+            else:
+                con1[i,k] = model.addConstr(r[i,k] == prodCapability[i] * x[i,k] + r[i,k-1] - demand[i][k],
+                                            'con1[' + str(i) + ',' + str(k) + ']-')
+    constrs['con1'] = con1
+
+    if variant == 'C':
+        first, rest = freezePairs(instance)
+        con2 = {}
+        for k, l in first:
+            con2[k] = model.addConstr(quicksum(x[i,k] for i in I) == quicksum(x[i,l] for i in I),
+                                      'con2[' + str(k) + ']-')
+        con3 = {}
+        for k, l in rest:
+            con3[k] = model.addConstr(quicksum(x[i,k] for i in I) == quicksum(x[i,l] for i in I),
+                                      'con2[' + str(k) + ']-')
+        constrs['con2'], constrs['con3'] = con2, con3
+
+    if variant == 'F':
+        first, rest = freezePairs(instance)
+        con2_1 = {}
+        for i in I:
+            for k, l in first:
+                con2_1[i,k] = model.addConstr(quicksum(x[i,k] for i in I) == quicksum(x[i,l] for i in I),
+                                              'con2_1[' + str(i) + str(k) + ']-')
+        con2_2 = {}
+        for i in I:
+            for k, l in rest:
+                con2_2[i,k] = model.addConstr(quicksum(x[i,k] for i in I) == quicksum(x[i,l] for i in I),
+                                              'con2_2[' + str(i) + str(k) + ']-')
+        con3 = {}
+        for i in I:
+            for s in S:
+                if s == 0:
+                    con3[i,s] = model.addConstr(v[i,s] == 0, 'con3[' + str(i) + str(s) + ']')
+                else:
+                    con3[i,s] = model.addConstr(quicksum(v[i,s] for i in I) == quicksum(x[i,s-1] for i in I)
+                                                - quicksum(x[i,s] for i in I), 'con3[' + str(i) + str(s) + ']')
+        constrs['con2_1'], constrs['con2_2'], constrs['con3'] = con2_1, con2_2, con3
+
+    if variant == 'H':
+        con2 = {}
+        for i in I:
+            for k in K:
+                if k == 0:
+                    con2[i,k] = model.addConstr(quicksum(x[i,k] for i in I) == quicksum(n[i,k] for i in I) -
+                                                quicksum(b[i,k] for i in I),
+                                                'con2[' + str(i) + ',' + str(k) + ']-')
+                else:
+                    con2[i,k] = model.addConstr(quicksum(x[i,k] for i in I) == quicksum(x[i,k-1] for i in I) +
+                                                quicksum(n[i,k] for i in I) - quicksum(b[i,k] for i in I),
+                                                'con2[' + str(i) + ',' + str(k) + ']-')
+        con3 = {}
+        for i in I:
+            for k in K:
+                if k <= contractPeriods-1:
+                    con3[i,k] = model.addConstr(quicksum(m[i,k] for i in I) == 0, 'con3[' + str(i) + ',' + str(k) + ']-')
+                else:
+                    con3[i,k] = model.addConstr(quicksum(m[i,k] for i in I) == quicksum(
+                        (m[i,k-1] - b[i,k-1] if k > 0 else 0) + n[i,k-contractPeriods] for i in I),
+                        'con3[' + str(i) + ',' + str(k) + ']-')
+        con4 = {}
+        for i in I:
+            for k in K:
+                con4[i,k] = model.addConstr(quicksum(b[i,k] for i in I) <= quicksum(m[i,k] for i in I),
+                                            'con4[' + str(i) + ',' + str(k) + ']-')
+        con5 = {}
+        for k in K:
+            con5[k] = model.addConstr(quicksum(n[i,k] for i in I) <= bigM * a[k], 'con5[' + str(k) + ']-')
+        constrs.update(con2=con2, con3=con3, con4=con4, con5=con5)
+    return constrs
+
+
+# ----- sparse blocks -----
+
+def _aggregate(nI, nK, shift=0):
+    # (nK, nI*nK) block whose row k sums the month k-shift entries over all products
+    if shift >= nK:
+        return sp.csr_matrix((nK, nI * nK))
+    return sp.kron(np.ones((1, nI)), sp.eye(nK, k=-shift), format='csr')
+
+
+def _rows(block, mask):
+    # keep the rows of ``block`` selected by ``mask`` and zero the others
+    return sp.diags(np.asarray(mask, dtype=float)) @ block
+
+
+def freezePairs(instance):
+    """Month pairs (k, k+1) whose total workforce must be equal.
+
+    Within every quarter starting at s the first list holds (s, s+1) (con2)
+    and the second (s+1, s+2), ... (con3), as in Implement_C.py.  With
+    ``quarterLength`` 12 the workforce is frozen over the whole year as in
+    Time_Plots_Annually.py.
+    """
+    nK, length = instance.nMonths, instance.quarterLength
+    first = [(s, s + 1) for s in instance.S if s + 1 < nK]
+    rest = [(s + j, s + j + 1) for j in range(1, length - 1) for s in instance.S if s + j + 1 < nK]
+    return first, rest
+
+
+def _quarterBlocks(instance):
+    # rows sum_i x[i,k] - sum_i x[i,k+1] of the quarter freeze, for con2 and con3
+    nK = instance.nMonths
+    ones = np.ones((1, instance.nProducts))
+    blocks = []
+    for pairs in freezePairs(instance):
+        pairs = np.array(pairs, dtype=int).reshape(-1, 2)
+        freeze = sp.csr_matrix((np.tile([1.0, -1.0], len(pairs)),
+                                (np.repeat(np.arange(len(pairs)), 2), pairs.ravel())), shape=(len(pairs), nK))
+        blocks.append(sp.kron(ones, freeze, format='csr'))
+    return blocks
+
+
+def balanceBlocks(instance):
+    """Sparse blocks of con1: Ax @ x + Ar @ r == rhs, one row per (i, k)."""
+    nI, nK = instance.nProducts, instance.nMonths
+    Ax = sp.diags(-np.repeat(instance.prodCapability, nK), format='csr')
+    Ar = sp.kron(sp.eye(nI), sp.eye(nK) - sp.eye(nK, k=-1), format='csr')
+    return Ax, Ar, -instance.demand.ravel()
+
+
+def contractBlocks(instance):
+    """Sparse blocks of con3 in H: Am @ m + Ab @ b + An @ n == 0, one row per month."""
+    nI, nK = instance.nProducts, instance.nMonths
+    month, previous = _aggregate(nI, nK), _aggregate(nI, nK, 1)
+    hired = _aggregate(nI, nK, instance.contractPeriods)
+
+    # before the first contract ends nobody can be fired, afterwards the
+    # eligible pool grows by the hires of contractPeriods months ago
+    ended = np.arange(nK) >= instance.contractPeriods
+    Am = _rows(month, ~ended) + _rows(month - previous, ended)
+    Ab = _rows(previous, ended)
+    An = -_rows(hired, ended)
+    return Am, Ab, An
+
+
+def addContractConstr(model, vars, instance):
+    """Add the con3 block of H for ``instance.contractPeriods`` and return it."""
+    Am, Ab, An = contractBlocks(instance)
+    return model.addConstr(Am @ vars['m'].reshape(-1) + Ab @ vars['b'].reshape(-1) +
+                           An @ vars['n'].reshape(-1) == 0, name='con3')
+
+
+# ----- matrix builder -----
+
+def buildMatrixModel(variant, instance=None, output=False, profiler=None, profile=False):
+    """Build ``variant`` from MVars and sparse constraint blocks.
+
+    The variables, objective coefficients and constraint rows come out in the
+    same order and with the same coefficients as :func:`buildLoopModel`,
+    except that the aggregate rows of F and H are added once instead of once
+    per product (see :func:`planning.lint.lintModel`).  ``profiler`` and
+    ``profile`` are as in :func:`buildLoopModel`.
+    """
+    _checkVariant(variant)
+    phase = (profiler or NO_PROFILER).phase
+    instance = instance if instance is not None else baseInstance()
+    start = time.perf_counter()
+
+    nI, nK, S = instance.nProducts, instance.nMonths, instance.S
+    shape = (nI, nK)
+    model, applied = _newModel(output, variant, profile)
+    vars, constrs = {}, {}
+
+    # ----- Variables -----
+
+    with phase('variables'):
+        x = model.addMVar(shape, lb=0, vtype=GRB.CONTINUOUS if variant == 'A' else GRB.INTEGER, name='X')
+        r = model.addMVar(shape, lb=np.broadcast_to(instance.storageMin, shape), vtype=GRB.CONTINUOUS, name='R')
+        vars['x'], vars['r'] = x, r
+        if variant == 'F':
+            vars['v'] = model.addMVar((nI, len(S)), lb=0, vtype=GRB.INTEGER, name='V')
+        if variant == 'H':
+            for name in ('n', 'm', 'b'):
+                vars[name] = model.addMVar(shape, lb=0, vtype=GRB.INTEGER, name=name.upper())
+            vars['a'] = model.addMVar(nK, vtype=GRB.BINARY, name='A')
+    with phase('update'):
+        model.update()
+
+    # ---- Objective Function ----
+
+    with phase('objective'):
+        x.Obj = np.broadcast_to(instance.workerCosts, shape)
+        r.Obj = np.broadcast_to(instance.holdingCosts[:, None], shape)
+        if variant == 'F':
+            vars['v'].Obj = np.full((nI, len(S)), instance.firingCost)
+        if variant == 'H':
+            vars['b'].Obj = np.full(shape, instance.firingCost)
+            vars['a'].Obj = np.full(nK, instance.trainingCost)
+        model.modelSense = GRB.MINIMIZE
+
+    # ---- Constraints ----
+
+    with phase('constraints'):
+        xv, rv = x.reshape(-1), r.reshape(-1)
+        Ax, Ar, rhs = balanceBlocks(instance)
+        constrs['con1'] = model.addConstr(Ax @ xv + Ar @ rv == rhs, name='con1')
+
+        if variant == 'C':
+            freeze1, freeze2 = _quarterBlocks(instance)
+            constrs['con2'] = model.addConstr(freeze1 @ xv == 0, name='con2')
+            constrs['con3'] = model.addConstr(freeze2 @ xv == 0, name='con3')
+
+        if variant == 'F':
+            freeze1, freeze2 = _quarterBlocks(instance)
+            constrs['con2_1'] = model.addConstr(freeze1 @ xv == 0, name='con2_1')
+            constrs['con2_2'] = model.addConstr(freeze2 @ xv == 0, name='con2_2')
+
+            # rows (i, s): v[i,0] == 0 at the first arrangement moment, otherwise the
+            # workers fired in all types equal the drop of the total workforce; the
+            # latter do not depend on i and are kept for the first product only
+            nS = len(S)
+            first = np.tile(np.asarray(S) == 0, nI)
+            keep = first | (np.repeat(np.arange(nI), nS) == 0)
+            Av = _rows(sp.eye(nI * nS, format='csr'), first) + \
+                 _rows(sp.kron(np.ones((nI, 1)), sp.kron(np.ones((1, nI)), sp.eye(nS))), ~first)
+            drop = sp.csr_matrix(np.array([[(1.0 if k == s else 0.0) - (1.0 if k == s - 1 else 0.0) for k in range(nK)]
+                                           for s in S]).reshape(nS, nK))
+            Axv = _rows(sp.kron(np.ones((nI, 1)), sp.kron(np.ones((1, nI)), drop)), ~first)
+            constrs['con3'] = model.addConstr(Av.tocsr()[keep] @ vars['v'].reshape(-1) + Axv.tocsr()[keep] @ xv == 0,
+                                              name='con3')
+
+        if variant == 'H':
+            nv, mv, bv = (vars[name].reshape(-1) for name in ('n', 'm', 'b'))
+            month, previous = _aggregate(nI, nK), _aggregate(nI, nK, 1)
+
+            # one row per month: the scripts repeat each of them for every product
+            constrs['con2'] = model.addConstr((month - previous) @ xv - month @ nv + month @ bv == 0, name='con2')
+            constrs['con3'] = addContractConstr(model, vars, instance)
+            constrs['con4'] = model.addConstr(month @ bv - month @ mv <= 0, name='con4')
+            constrs['con5'] = model.addConstr(month @ nv - bigM * vars['a'] <= 0, name='con5')
+
+    with phase('update'):
+        model.update()
+    return PlanningModel(variant, instance, model, vars, constrs, time.perf_counter() - start, applied)
+
+
+# ----- comparison of the two paths -----
+
+def modelArrays(model):
+    """Constraint matrix and attribute vectors that define ``model``."""
+    model.update()
+    return {'A': model.getA().tocsr(),
+            'Obj': np.array(model.getAttr('Obj')),
+            'LB': np.array(model.getAttr('LB')),
+            'UB': np.array(model.getAttr('UB')),
+            'VType': np.array(model.getAttr('VType')),
+            'RHS': np.array(model.getAttr('RHS')),
+            'Sense': np.array(model.getAttr('Sense'))}
+
+
+def sameModel(first, second, tol=1e-9):
+    """True when both models have identical rows, columns and coefficients."""
+    one, two = modelArrays(first), modelArrays(second)
+    if one['A'].shape != two['A'].shape:
+        return False
+    difference = (one['A'] - two['A']).data
+    if difference.size and np.abs(difference).max() > tol:
+        return False
+    return all(np.array_equal(one[key], two[key]) if one[key].dtype.kind in 'OU' else
+               np.allclose(one[key], two[key], atol=tol) for key in one if key != 'A')
+
+
+def measureBuild(builder, variant, instance):
+    """Build once and return (PlanningModel, seconds, python peak bytes, RSS delta bytes)."""
+    rss = rssBytes()
+    tracemalloc.start()
+    try:
+        built = builder(variant, instance)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return built, built.buildTime, peak, rssBytes() - rss
+
+
+def compareBuilders(variant, instance=None):
+    """Build ``variant`` with both paths and report time, memory and equality.
+
+    The loop built model is linted first, ``lintRows`` and ``lintNonzeros``
+    are the duplicated rows and their nonzeros the scripts add.
+    """
+    instance = instance if instance is not None else baseInstance()
+    loop, loopTime, loopPeak, loopRss = measureBuild(buildLoopModel, variant, instance)
+    matrix, matrixTime, matrixPeak, matrixRss = measureBuild(buildMatrixModel, variant, instance)
+    lint = lintModel(loop.model)
+    report = {'variant': variant, 'instance': instance.name,
+              'vars': matrix.model.NumVars, 'constrs': matrix.model.NumConstrs,
+              'lintRows': lint['rowsRemoved'], 'lintNonzeros': lint['nonzerosRemoved'],
+              'loopTime': loopTime, 'matrixTime': matrixTime,
+              'loopPeakMB': loopPeak / 2**20, 'matrixPeakMB': matrixPeak / 2**20,
+              'loopRssMB': loopRss / 2**20, 'matrixRssMB': matrixRss / 2**20,
+              'same': sameModel(loop.model, matrix.model)}
+    loop.model.dispose()
+    matrix.model.dispose()
+    return report
+
@@ -0,0 +1,148 @@
+# Products Manufacturing with lowest cost
+# Content-addressed on-disk cache of solves
+#
+# A solve is determined by the formulation, every number of the instance and
+# the solver parameters that change the answer.  solveKey hashes them in a
+# canonical form (arrays as float64 bytes with their shape, scalars as
+# JSON), and SolveCache keeps one compressed .npz file per key holding the
+# variable families and the statistics of the solve.  A hit touches the
+# file; when the files exceed ``maxBytes`` the least recently used ones are
+# removed.  Only optimal solves are stored, a stopped solve depends on the
+# machine it ran on.
+
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .backends import solve
+from .profiles import changedParams
+from .results import SolveResult
+
+
+# parameters that only change how the solve is run, not its answer
+IGNORED_PARAMS = ('OutputFlag', 'LogToConsole', 'LogFile', 'Threads')
+
+ARRAY_FIELDS = ('holdingCosts', 'workerCosts', 'prodCapability', 'demand', 'storageMin')
+SCALAR_FIELDS = ('firingCost', 'trainingCost', 'contractPeriods', 'quarterLength')
+
+
+def solveKey(variant, instance, params=None, backend='gurobi'):
+    """Hex digest identifying the solve of ``variant`` on ``instance`` with ``params``."""
+    digest = hashlib.sha256()
+    head = {'variant': variant, 'backend': backend,
+            'params': sorted((name, value) for name, value in (params or {}).items() if name not in IGNORED_PARAMS),
+            'scalars': [float(getattr(instance, name)) for name in SCALAR_FIELDS]}
+    digest.update(json.dumps(head, sort_keys=True).encode())
+    for name in ARRAY_FIELDS:
+        values = np.ascontiguousarray(getattr(instance, name), dtype=float)
+        digest.update(('%s%s' % (name, values.shape)).encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def _plain(point):
+    # the JSON-serialisable scalar fields of a point
+    return {name: value.item() if isinstance(value, np.generic) else value for name, value in point.items()
+            if isinstance(value, (int, float, str, bool, type(None), np.generic))}
+
+
+class SolveCache:
+    """Solve results on disk under ``root``, at most ``maxBytes`` in total.
+
+    ``hits``, ``misses`` and ``evictions`` count the lookups of this
+    object; ``stats()`` adds the number and size of the files.
+    """
+
+    def __init__(self, root, maxBytes=256 * 2**20):
+        self.root = root
+        self.maxBytes = maxBytes
+        self.hits = self.misses = self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key + '.npz')
+
+    def get(self, key):
+        """(SolveResult, point fields) stored under ``key``, or None."""
+        path = self._path(key)
+        try:
+            with np.load(path) as stored:
+                meta = json.loads(str(stored['__meta__']))
+                values = {name[2:]: stored[name] for name in stored.files if name.startswith('v_')}
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        os.utime(path)           # most recently used
+        self.hits += 1
+        result = SolveResult(values=values, **meta['result'])
+        if result.hireLimit is not None:
+            result.hireLimit = np.array(result.hireLimit)
+        return result, meta['point']
+
+    def put(self, key, result, point=None):
+        """Store ``result`` and the scalar fields of ``point`` under ``key``."""
+        meta = {'result': {name: getattr(result, name) for name in
+                           ('backend', 'status', 'objVal', 'solveTime', 'nodes', 'gap', 'message', 'variant',
+                            'profile')},
+                'point': _plain(point or {})}
+        if result.hireLimit is not None:
+            meta['result']['hireLimit'] = result.hireLimit.tolist()
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, __meta__=np.array(json.dumps(meta)),
+                            **{'v_' + name: values for name, values in result.values.items()})
+        # write next to the target and rename, so readers never see half a file
+        handle, temporary = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            file.write(buffer.getvalue())
+        os.replace(temporary, self._path(key))
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith('.npz'):
+                status = os.stat(os.path.join(self.root, name))
+                entries.append((status.st_mtime, status.st_size, name))
+        return sorted(entries)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in maxBytes."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.maxBytes:
+                break
+            os.remove(os.path.join(self.root, name))
+            total -= size
+            self.evictions += 1
+
+    def solve(self, built, backend='gurobi', params=None):
+        """SolveResult of a built model, from the cache when it was solved to optimality before.
+
+        The key covers every non-default parameter of the model, a profile
+        included, and ``params``.
+        """
+        key = solveKey(built.variant, built.instance, dict(changedParams(built.model), **(params or {})), backend)
+        hit = self.get(key)
+        if hit is not None:
+            result, _ = hit
+            result.instance = built.instance
+            return result
+        result = solve(built, backend, params)
+        if result.optimal:
+            self.put(key, result)
+        return result
+
+    def stats(self):
+        entries = self._entries()
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(entries), 'bytes': sum(size for _, size, _ in entries)}
+
+    def clear(self):
+        for _, _, name in self._entries():
+            os.remove(os.path.join(self.root, name))
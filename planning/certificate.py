@@ -0,0 +1,99 @@
+# Products Manufacturing with lowest cost
+# Independent check of a reported plan
+#
+# The scripts print model.objVal and the tables as the solver returns them.
+# checkSolution recomputes, from the value arrays alone, the violation of
+# every constraint family of the formulation, the integrality of the integer
+# families and the cost, so a wrong model, a wrong extraction or a solver
+# tolerance problem shows up as a flagged check.  Everything is a handful of
+# array operations on (products x months) arrays, well under a millisecond
+# per plan of the base instance (about 0.05 ms for A, 0.2-0.7 ms for H), so
+# it can run after every solve of a sweep.
+
+
+import numpy as np
+
+from .builder import bigM
+from .results import costComponents
+
+
+FEASIBILITY_TOL = 1e-6     # Gurobi FeasibilityTol
+INTEGRALITY_TOL = 1e-5     # Gurobi IntFeasTol
+
+INTEGER = {'A': (), 'C': ('x',), 'F': ('x', 'v'), 'H': ('x', 'n', 'm', 'b', 'a')}
+
+
+def _shifted(values, shift):
+    # values[k - shift] along the months, zero before the first month
+    shifted = np.zeros_like(values)
+    if shift < values.shape[-1]:
+        shifted[..., shift:] = values[..., :values.shape[-1] - shift]
+    return shifted
+
+
+def _worst(violation):
+    return float(np.max(np.abs(violation), initial=0.0))
+
+
+def violations(values, instance, variant, hireLimit=None):
+    """Largest violation of every constraint family, bound and integrality of a plan.
+
+    ``hireLimit`` is the coefficient of a in con5 per month (see
+    PlanningModel.hireLimits), bigM when it is not given.
+    """
+    x, r = values['x'], values['r']
+    workforce = x.sum(axis=0)
+    checks = {
+        'con1': _worst(r - _shifted(r, 1) - instance.prodCapability[:, None] * x + instance.demand),
+        'storageMin': _worst(np.clip(np.broadcast_to(instance.storageMin, r.shape) - r, 0, None)),
+    }
+    for name, family in values.items():
+        if name != 'r':
+            checks['lb_' + name] = _worst(np.clip(-family, 0, None))
+    if variant in ('C', 'F'):
+        # the total workforce equals that of the first month of its quarter
+        first = np.arange(instance.nMonths) // instance.quarterLength * instance.quarterLength
+        checks['freeze'] = _worst(workforce - workforce[first])
+    if variant == 'F':
+        v, S = values['v'], np.asarray(instance.S)
+        drop = np.where(S == 0, 0.0, _shifted(workforce, 1)[S] - workforce[S])
+        checks['con3'] = _worst(np.where(S == 0, v, 0.0)) + _worst(np.where(S == 0, 0.0, v.sum(axis=0) - drop))
+    if variant == 'H':
+        hired, fireable, fired = (values[name].sum(axis=0) for name in ('n', 'm', 'b'))
+        checks['con2'] = _worst(workforce - _shifted(workforce, 1) - hired + fired)
+        ended = np.arange(instance.nMonths) >= instance.contractPeriods
+        pool = _shifted(fireable, 1) - _shifted(fired, 1) + _shifted(hired, instance.contractPeriods)
+        checks['con3'] = _worst(fireable - np.where(ended, pool, 0.0))
+        checks['con4'] = _worst(np.clip(fired - fireable, 0, None))
+        # against the rounded a: within IntFeasTol a = 1e-5 already allows bigM * 1e-5 hires
+        limit = np.where(np.round(values['a']) > 0, bigM if hireLimit is None else hireLimit, 0.0)
+        checks['con5'] = _worst(np.clip(hired - limit, 0, None))
+        checks['ub_a'] = _worst(np.clip(values['a'] - 1, 0, None))
+    for name in INTEGER[variant]:
+        checks['int_' + name] = _worst(values[name] - np.round(values[name]))
+    return checks
+
+
+def checkSolution(values, instance, variant, objVal=None, tol=FEASIBILITY_TOL, intTol=INTEGRALITY_TOL,
+                  costTol=1e-6, hireLimit=None):
+    """Certificate of a plan: violations, recomputed cost and the checks over tolerance.
+
+    ``values`` maps the families of ``variant`` to arrays, e.g. the values
+    of a SolveResult.  The cost components are recomputed and compared with
+    ``objVal`` relative to its size.  ``failed`` lists the checks that
+    exceed their tolerance, ``ok`` is True when there are none.  For H,
+    ``hireLimit`` is the con5 coefficient of the model the plan came from,
+    so a plan of a tightened model is checked against its tighter rows.
+    """
+    checks = violations(values, instance, variant, hireLimit)
+    costs = costComponents(values, instance)
+    total = sum(costs.values())
+    failed = [name for name, violation in checks.items()
+              if violation > (intTol if name.startswith('int_') else tol)]
+    costError = None
+    if objVal is not None:
+        costError = abs(total - objVal) / max(1.0, abs(objVal))
+        if costError > costTol:
+            failed.append('cost')
+    return {'ok': not failed, 'failed': failed, 'checks': checks, 'costs': costs, 'total': total,
+            'costError': costError, 'maxViolation': max(checks.values())}
@@ -0,0 +1,90 @@
+# Products Manufacturing with lowest cost
+# Solver-free exact plan for the continuous model A
+#
+# In Implement_A.py every product type is an independent single-item
+# problem: con1 is pure inventory balance, workers are continuous and there
+# is no capacity.  The demand of month k is therefore best produced in the
+# month j <= k minimising
+#
+#     workerCosts[j] / prodCapability[i] + holdingCosts[i] * (k - j)
+#
+# which is a running minimum over the horizon.  solveContinuous does this
+# for all products and months at once with NumPy.
+
+
+import time
+
+import numpy as np
+
+from .instance import baseInstance
+
+
+def unitCosts(instance):
+    """Cheapest cost of one unit of product i delivered in month k, and the month it is made.
+
+    Returns (cost, source) of shape (products, months).
+    """
+    nK = instance.nMonths
+    # produce in j, hold until k: cost[j]/cap - h*j, plus h*k; minimise the
+    # first part with a running minimum over j <= k
+    perUnit = instance.workerCosts[None, :] / instance.prodCapability[:, None]
+    shifted = perUnit - instance.holdingCosts[:, None] * np.arange(nK)[None, :]
+    best = np.minimum.accumulate(shifted, axis=1)
+    # the last month that set the running minimum is where the unit is made
+    source = np.maximum.accumulate(np.where(shifted <= best, np.arange(nK)[None, :], 0), axis=1)
+    cost = best + instance.holdingCosts[:, None] * np.arange(nK)[None, :]
+    return cost, source
+
+
+def solveContinuous(instance=None):
+    """Optimal x/r of formulation A without a solver.
+
+    Returns a dict with x and r of shape (products, months), the total
+    cost and its holding and salary parts, like the Gurobi model.
+    """
+    instance = instance if instance is not None else baseInstance()
+    start = time.perf_counter()
+    nI, nK = instance.nProducts, instance.nMonths
+    demand = instance.demand
+    if (demand < 0).any():
+        raise ValueError('the closed form needs non-negative demand')
+    if np.any(instance.storageMin):
+        raise ValueError('the closed form does not handle a storage minimum, use the Gurobi model')
+    cost, source = unitCosts(instance)
+
+    # units produced in month j: all demand whose cheapest source is j
+    cells = (np.arange(nI)[:, None] * nK + source).ravel()
+    produced = np.bincount(cells, weights=demand.ravel(), minlength=nI * nK).reshape(nI, nK)
+    x = produced / instance.prodCapability[:, None]
+    # production matches demand exactly, only rounding can make r negative
+    r = np.maximum(np.cumsum(produced - demand, axis=1), 0.0)
+
+    holding = float(instance.holdingCosts @ r.sum(axis=1))
+    salary = float(x.sum(axis=0) @ instance.workerCosts)
+    return {'x': x, 'r': r, 'objVal': holding + salary, 'holding': holding, 'salary': salary,
+            'firing': 0.0, 'training': 0.0, 'unitCosts': cost, 'source': source,
+            'solveTime': time.perf_counter() - start}
+
+
+def crossCheck(instance=None, tol=1e-6):
+    """Solve A with Gurobi and with solveContinuous and compare the costs.
+
+    The plans may differ where several months are equally cheap, the
+    costs may not.  Returns the closed form, the Gurobi point, their
+    relative gap and ``mismatch``, a message when the gap exceeds ``tol``
+    and None otherwise.
+    """
+    from .template import PlanningTemplate
+
+    instance = instance if instance is not None else baseInstance()
+    closed = solveContinuous(instance)
+    template = PlanningTemplate('A', instance)
+    try:
+        point = template.optimize()
+    finally:
+        template.dispose()
+    gap = abs(closed['objVal'] - point['objVal']) / max(1.0, abs(point['objVal']))
+    mismatch = None
+    if gap > tol:
+        mismatch = 'closed form %.6f differs from Gurobi %.6f' % (closed['objVal'], point['objVal'])
+    return {'closed': closed, 'gurobi': point, 'gap': gap, 'mismatch': mismatch}
@@ -0,0 +1,122 @@
+# Products Manufacturing with lowest cost
+# Constructive hire/fire plan that seeds the contract model H
+#
+# Implementation_H.py is solved cold, and most of the branch-and-bound time
+# goes into finding good incumbents.  constructHirePlan builds a feasible
+# integer plan month by month:
+#
+#   - the workers needed for each type are the just-in-time requirement
+#     ceil((demand + storageMin - inventory) / prodCapability),
+#   - a shortage of workers is hired (one training per hiring month),
+#   - a surplus is fired when the contract bookkeeping (con3/con4) allows it
+#     and the workers are not needed again within the firing horizon,
+#   - workers that are kept but not needed produce the type that is
+#     cheapest to hold, which lowers later requirements.
+#
+# Only sums over the types enter con2-con5, so hires, fireable and fired
+# workers are booked on the first type.  seedModel passes the plan to
+# Gurobi as MIP start and as VarHintVal hints.
+
+
+import math
+import time
+
+import numpy as np
+
+from .instance import baseInstance
+from .results import costComponents
+
+
+def constructHirePlan(instance=None, horizon=None):
+    """Feasible integer x, r, n, m, b, a for formulation H and its cost.
+
+    ``horizon`` is how many months ahead a surplus worker must be needed
+    to be kept; by default the number of monthly salaries a firing costs.
+    """
+    instance = instance if instance is not None else baseInstance()
+    start = time.perf_counter()
+    nI, nK = instance.nProducts, instance.nMonths
+    capability, demand = instance.prodCapability, instance.demand
+    storageMin = np.broadcast_to(instance.storageMin, demand.shape)
+    contract = instance.contractPeriods
+    if horizon is None:
+        horizon = max(1, math.ceil(instance.firingCost / max(1.0, instance.workerCosts.min())))
+
+    # requirement without stock, to decide whether a surplus is needed soon
+    rawNeed = np.ceil(demand / capability[:, None] - 1e-9).sum(axis=0)
+    stockpile = int(np.argmin(instance.holdingCosts * capability))
+
+    x = np.zeros((nI, nK))
+    r = np.zeros((nI, nK))
+    n = np.zeros((nI, nK))
+    m = np.zeros((nI, nK))
+    b = np.zeros((nI, nK))
+    a = np.zeros(nK)
+
+    stock = np.zeros(nI)
+    workforce = 0.0
+    hired = np.zeros(nK)
+    fired = np.zeros(nK)
+    eligible = np.zeros(nK)
+    for k in range(nK):
+        need = np.maximum(0.0, np.ceil((demand[:, k] + storageMin[:, k] - stock) / capability - 1e-9))
+        target = need.sum()
+
+        if target > workforce:
+            hired[k] = target - workforce
+
+        # con3: nobody can be fired before the first contracts end
+        if k >= contract:
+            eligible[k] = (eligible[k - 1] - fired[k - 1] if k > 0 else 0.0) + hired[k - contract]
+
+        if target < workforce:
+            soon = rawNeed[k + 1:k + 1 + horizon].max(initial=0.0)
+            surplus = workforce - max(target, min(workforce, soon))
+            fired[k] = min(surplus, eligible[k])
+        workforce = workforce + hired[k] - fired[k]
+
+        # workers beyond the requirement produce the cheapest type to hold
+        need[stockpile] += workforce - target if workforce > target else 0.0
+        x[:, k] = need
+        stock = stock + capability * need - demand[:, k]
+        r[:, k] = stock
+
+    n[0], m[0], b[0] = hired, eligible, fired
+    a[:] = hired > 0
+    plan = {'x': x, 'r': np.maximum(r, 0.0), 'n': n, 'm': m, 'b': b, 'a': a}
+    plan['objVal'] = planCost(plan, instance)
+    plan['buildTime'] = time.perf_counter() - start
+    return plan
+
+
+def planCost(plan, instance):
+    return sum(costComponents(plan, instance).values())
+
+
+def seedModel(template, plan, start=True, hints=True):
+    """Inject ``plan`` into a resident H template as Start and/or VarHintVal."""
+    for name, var in template.vars.items():
+        if name not in plan:
+            continue
+        if start:
+            var.Start = plan[name]
+        if hints and name != 'r':
+            var.VarHintVal = plan[name]
+
+
+def compareSeeding(instance=None, params=None):
+    """Solve H cold and seeded and return both points and the heuristic."""
+    from .template import PlanningTemplate
+
+    instance = instance if instance is not None else baseInstance()
+    plan = constructHirePlan(instance)
+    points = {}
+    for mode in ('cold', 'seeded'):
+        template = PlanningTemplate('H', instance, params=params)
+        try:
+            if mode == 'seeded':
+                seedModel(template, plan)
+            points[mode] = template.optimize()
+        finally:
+            template.dispose()
+    return plan, points
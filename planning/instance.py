@@ -0,0 +1,151 @@
+# Products Manufacturing with lowest cost
+# Problem data shared by the A/C/F/H formulations
+#
+# The parameter names follow the scripts in Implementation_A&C&F&H so that
+# an instance can be read side by side with the original models.
+
+
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+
+
+# ----- parameters of the original scripts -----
+
+# holdingcosts per month per product
+holdingCosts      =  (6, 8, 10)                      # euro/unit
+
+# cost of one worker in each month
+workerCosts       =  (2000, 2000, 2500, 2500,        # euro
+                      2500, 3000, 3000, 3000,
+                      2500, 2500, 2000, 2000)
+
+# number of products of each type produced by a worker in a month
+prodCapability    =  (15, 20, 10)                    #  unit
+
+# products demond for each type in each month
+demand        =      ((750, 650, 600, 500, 130.3, 650, 600, 750, 650, 600, 500, 550),     # unit
+                      (550, 500, 450, 275, 350, 300, 500, 600, 500, 400.6, 300, 250),
+                      (550, 500, 500, 320.5, 300, 150.2, 225, 500, 450, 350, 300, 350))
+
+firingCost = 2000     # euro
+trainingCost = 5000   # euro
+
+contractPeriods = 6   # month
+
+
+@dataclass(eq=False)
+class Instance:
+    """Data of one planning problem, stored as float arrays.
+
+    ``demand`` has shape (products, months); ``holdingCosts`` and
+    ``prodCapability`` are per product and ``workerCosts`` is per month.
+    """
+
+    holdingCosts: np.ndarray
+    workerCosts: np.ndarray
+    prodCapability: np.ndarray
+    demand: np.ndarray
+    firingCost: float = firingCost
+    trainingCost: float = trainingCost
+    contractPeriods: int = contractPeriods
+    quarterLength: int = 3
+    # lower bound on the remaining products r, scalar or per (product, month)
+    storageMin: float = 0.0
+    name: str = field(default='base', compare=False)
+
+    def __post_init__(self):
+        self.holdingCosts = np.asarray(self.holdingCosts, dtype=float)
+        self.workerCosts = np.asarray(self.workerCosts, dtype=float)
+        self.prodCapability = np.asarray(self.prodCapability, dtype=float)
+        self.demand = np.asarray(self.demand, dtype=float)
+        if self.demand.shape != (len(self.holdingCosts), len(self.workerCosts)):
+            raise ValueError('demand must have shape (products, months) = (%d, %d), got %s'
+                             % (len(self.holdingCosts), len(self.workerCosts), self.demand.shape))
+        if len(self.prodCapability) != len(self.holdingCosts):
+            raise ValueError('prodCapability must have one entry per product type')
+
+    # ----- sets -----
+
+    @property
+    def nProducts(self):
+        return len(self.holdingCosts)
+
+    @property
+    def nMonths(self):
+        return len(self.workerCosts)
+
+    @property
+    def I(self):
+        return range(self.nProducts)
+
+    @property
+    def K(self):
+        return range(self.nMonths)
+
+    @property
+    def S(self):
+        # arrangement moments: first month of each quarter
+        return list(range(0, self.nMonths, self.quarterLength))
+
+    def copy(self, **changes):
+        """Return a deep copy of the instance with some fields replaced."""
+        data = {key: np.array(value, dtype=float, copy=True) for key, value in
+                (('holdingCosts', self.holdingCosts), ('workerCosts', self.workerCosts),
+                 ('prodCapability', self.prodCapability), ('demand', self.demand))}
+        data['storageMin'] = np.copy(self.storageMin) if np.ndim(self.storageMin) else self.storageMin
+        data.update(changes)
+        return replace(self, **data)
+
+    def window(self, start, stop):
+        """Copy of the instance restricted to the months start..stop-1."""
+        storageMin = self.storageMin
+        if np.ndim(storageMin) == 2:
+            storageMin = np.array(storageMin[:, start:stop], dtype=float)
+        return self.copy(workerCosts=self.workerCosts[start:stop], demand=self.demand[:, start:stop],
+                         storageMin=storageMin, name='%s[%d:%d]' % (self.name, start, stop))
+
+
+def baseInstance(**changes):
+    """The 3 product, 12 month instance hard-coded in the original scripts."""
+    instance = Instance(holdingCosts, workerCosts, prodCapability, demand)
+    return instance.copy(**changes) if changes else instance
+
+
+def scaleInstance(instance, nProducts, nMonths):
+    """Repeat the data of ``instance`` cyclically up to nProducts x nMonths."""
+    demandRows = np.resize(np.arange(instance.nProducts), nProducts)
+    demandCols = np.resize(np.arange(instance.nMonths), nMonths)
+    return instance.copy(holdingCosts=instance.holdingCosts[demandRows],
+                         workerCosts=instance.workerCosts[demandCols],
+                         prodCapability=instance.prodCapability[demandRows],
+                         demand=instance.demand[np.ix_(demandRows, demandCols)],
+                         name='%s-%dx%d' % (instance.name, nProducts, nMonths))
+
+
+def syntheticInstance(nProducts, nMonths, seed=0, **changes):
+    """Random instance with seasonal demand and salaries, reproducible from ``seed``.
+
+    Like the scripts, a worker makes 8-25 units of a type per month, holding
+    costs 4-12 euro per unit and month, salaries run from about 2000 in
+    winter to 3000 in summer and every type needs 20-50 workers' output per
+    month on average.  Demand follows a yearly cycle with a random peak
+    month, amplitude up to 40% and 10% noise.
+    """
+    rng = np.random.default_rng(seed)
+    months = np.arange(nMonths)
+    holding = rng.integers(4, 13, nProducts).astype(float)
+    capability = rng.integers(8, 26, nProducts).astype(float)
+
+    season = 0.5 - 0.5 * np.cos(2 * np.pi * (months - 0.5) / 12)
+    salaries = np.round((2000 + 1000 * season + rng.normal(0, 100, nMonths)) / 100) * 100
+
+    base = capability * rng.uniform(20, 50, nProducts)
+    amplitude = rng.uniform(0.1, 0.4, nProducts)
+    peak = rng.integers(0, 12, nProducts)
+    cycle = 1 + amplitude[:, None] * np.cos(2 * np.pi * (months[None, :] - peak[:, None]) / 12)
+    noise = rng.lognormal(0, 0.1, (nProducts, nMonths))
+    demand = np.round(base[:, None] * cycle * noise, 1)
+
+    instance = Instance(holding, salaries, capability, demand, name='synthetic-%dx%d-%d' % (nProducts, nMonths, seed))
+    return instance.copy(**changes) if changes else instance
@@ -0,0 +1,114 @@
+# Products Manufacturing with lowest cost
+# Contract rows of formulation H as lazy constraints
+#
+# con3 (the fireable pool m grows by the hires of contractPeriods months
+# ago and shrinks by the fires) and con4 (fires b <= m) are one row per
+# month each.  In lazy mode they are left out of the model; a MIPSOL
+# callback recomputes both families for every candidate incumbent with two
+# sparse products and adds the violated rows with cbLazy, so the solver only
+# carries the contract rows that actually cut off a plan.
+#
+# An experiment, not a command: the contract rows are what keeps the LP
+# relaxation of H tight, and without them the search explores far more
+# nodes.  With IntegralityFocus and one thread, lazy mode took 6-13x as
+# long on 3x12, 8-98x on 3x24 and 9-400x on 3x48.  On 3x72, for contract
+# lengths 3 to 24, it did not finish in the 60 s TimeLimit where the full
+# model needed 2-3.5 s.  No horizon or contract length made it pay off.
+
+
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB, LinExpr
+
+from .builder import buildMatrixModel, contractBlocks
+from .certificate import checkSolution
+from .instance import baseInstance
+from .results import SolveResult
+
+
+FAMILIES = ('m', 'b', 'n')
+
+
+def contractRows(instance):
+    """con3 and con4 of H as (matrix, sense) over the columns m, b, n."""
+    Am, Ab, An = contractBlocks(instance)
+    month = sp.kron(np.ones((1, instance.nProducts)), sp.eye(instance.nMonths), format='csr')
+    empty = sp.csr_matrix(month.shape)
+    return {'con3': (sp.hstack([Am, Ab, An], format='csr'), GRB.EQUAL),
+            'con4': (sp.hstack([-month, month, empty], format='csr'), GRB.LESS_EQUAL)}
+
+
+def lazyModel(instance=None):
+    """Build H without con3 and con4; returns the built model and the rows left out."""
+    instance = instance if instance is not None else baseInstance()
+    built = buildMatrixModel('H', instance)
+    built.model.remove([row for name in ('con3', 'con4') for row in built.constrs.pop(name).tolist()])
+    built.model.setParam('LazyConstraints', 1)
+    built.model.update()
+    return built, contractRows(instance)
+
+
+def _violated(residual, sense, tol):
+    return np.abs(residual) > tol if sense == GRB.EQUAL else residual > tol
+
+
+def optimizeLazy(built, rows, tol=1e-6):
+    """Optimize ``built`` adding the violated ``rows`` of every incumbent; returns the rows added per family."""
+    columns = [var for name in FAMILIES for var in built.vars[name].reshape(-1).tolist()]
+    added = {name: set() for name in rows}
+
+    def callback(model, where):
+        if where != GRB.Callback.MIPSOL:
+            return
+        values = np.array(model.cbGetSolution(columns))
+        for name, (matrix, sense) in rows.items():
+            for k in np.flatnonzero(_violated(matrix @ values, sense, tol)):
+                row = slice(matrix.indptr[k], matrix.indptr[k + 1])
+                expression = LinExpr(matrix.data[row].tolist(), [columns[j] for j in matrix.indices[row]])
+                if sense == GRB.EQUAL:
+                    model.cbLazy(expression == 0)
+                else:
+                    model.cbLazy(expression <= 0)
+                added[name].add(int(k))
+
+    built.model.optimize(callback)
+    return {name: sorted(months) for name, months in added.items()}
+
+
+def _point(built, solveTime, lazy):
+    model = built.model
+    result = SolveResult.fromModel(built, solveTime)
+    point = {'status': model.Status, 'objVal': result.objVal, 'rows': model.NumConstrs, 'nodes': model.NodeCount,
+             'solveTime': solveTime, 'nodesPerSecond': model.NodeCount / solveTime if solveTime > 0 else None,
+             'lazyRows': sum(len(months) for months in lazy.values())}
+    if result.values:
+        certificate = checkSolution(result.values, built.instance, 'H', result.objVal, hireLimit=result.hireLimit)
+        point.update(certified=certificate['ok'], failed=certificate['failed'])
+    return point
+
+
+def compareLazy(instance=None, params=None):
+    """Solve H with every contract row and in lazy mode; one point per mode.
+
+    A point holds the rows of the model, the contract rows added lazily,
+    nodes, solve time, nodes per second and whether the plan passes
+    checkSolution with all contract rows.
+    """
+    instance = instance if instance is not None else baseInstance()
+    # without IntegralityFocus either mode may hire a few workers under a = 1e-6
+    # of the big-M row con5, and the two optima differ by a training cost
+    params = dict({'MIPGap': 0, 'IntegralityFocus': 1}, **(params or {}), OutputFlag=0)
+    points = {}
+    for mode in ('full', 'lazy'):
+        built, rows = lazyModel(instance.copy()) if mode == 'lazy' else (buildMatrixModel('H', instance.copy()), {})
+        try:
+            for name, value in params.items():
+                built.model.setParam(name, value)
+            start = time.perf_counter()
+            lazy = optimizeLazy(built, rows)
+            points[mode] = _point(built, time.perf_counter() - start, lazy)
+        finally:
+            built.model.dispose()
+    return points
@@ -0,0 +1,81 @@
+# Products Manufacturing with lowest cost
+# Model lint: drop duplicated and dominated rows before optimize()
+#
+# Rows that are positive multiples of each other constrain the same
+# quantity.  lintModel scales every row so that its first coefficient is
+# +1 (flipping the sense of rows scaled by a negative number), groups
+# identical scaled rows and keeps per group
+#
+#   - the first equality, and no inequality it implies,
+#   - otherwise the tightest <= and the tightest >= row,
+#
+# together with every row that is satisfied by construction (no
+# coefficients and a right-hand side that holds).  The scripts of F and H
+# add each aggregate row once per product, which this removes.
+
+
+import time
+
+import numpy as np
+
+_FLIP = {'<': '>', '>': '<', '=': '='}
+
+
+def _holds(sense, rhs):
+    # does 0 (sense) rhs hold, for a row without coefficients
+    return rhs >= 0 if sense == '<' else rhs <= 0 if sense == '>' else rhs == 0
+
+
+def redundantRows(model, digits=12):
+    """Indices of the rows of ``model`` that duplicate or are dominated by others."""
+    model.update()
+    A = model.getA().tocsr()
+    senses, rhs = model.getAttr('Sense'), np.array(model.getAttr('RHS'))
+    groups, redundant = {}, []
+    for row in range(A.shape[0]):
+        start, end = A.indptr[row], A.indptr[row + 1]
+        if start == end:
+            if _holds(senses[row], rhs[row]):
+                redundant.append(row)
+            continue
+        scale = A.data[start]
+        key = (A.indices[start:end].tobytes(), np.round(A.data[start:end] / scale, digits).tobytes())
+        sense = senses[row] if scale > 0 else _FLIP[senses[row]]
+        groups.setdefault(key, []).append((row, sense, rhs[row] / scale))
+
+    for rows in groups.values():
+        if len(rows) == 1:
+            continue
+        equal = [row for row in rows if row[1] == '=']
+        if equal:
+            keep, value = equal[0][0], equal[0][2]
+            for row, sense, bound in rows:
+                implied = bound == value if sense == '=' else bound >= value if sense == '<' else bound <= value
+                if row != keep and implied:
+                    redundant.append(row)
+            continue
+        for direction in ('<', '>'):
+            side = [row for row in rows if row[1] == direction]
+            if len(side) > 1:
+                tightest = min if direction == '<' else max
+                keep = tightest(side, key=lambda row: row[2])[0]
+                redundant.extend(row for row, _, _ in side if row != keep)
+    return sorted(redundant)
+
+
+def lintModel(model, digits=12):
+    """Remove duplicated and dominated rows from ``model`` in place.
+
+    Returns a report with the rows and nonzeros before and removed, and the
+    time the pass took.  Constraint handles of removed rows become invalid.
+    """
+    start = time.perf_counter()
+    model.update()
+    rows, nonzeros = model.NumConstrs, model.NumNZs
+    redundant = redundantRows(model, digits)
+    if redundant:
+        constrs = model.getConstrs()
+        model.remove([constrs[row] for row in redundant])
+        model.update()
+    return {'rows': rows, 'nonzeros': nonzeros, 'rowsRemoved': rows - model.NumConstrs,
+            'nonzerosRemoved': nonzeros - model.NumNZs, 'lintTime': time.perf_counter() - start}
@@ -0,0 +1,77 @@
+# Products Manufacturing with lowest cost
+# Monte Carlo stress test of a fixed workforce plan
+#
+# Once the workers x[i,k] of a plan are fixed, the stock follows from con1
+# alone, r[i,k] = r[i,k-1] + prodCapability[i] x[i,k] - demand[i,k], so the
+# stock of many demand paths is one cumulative sum over the months and no
+# solver is needed.  Negative stock is demand carried over as backlog.  The
+# paths are drawn and evaluated in chunks, so the memory for the arrays is
+# that of one chunk; only the cost of every path is kept for the quantiles.
+
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from .results import monthNames
+
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+def lognormalDemand(demand, spread=0.2):
+    """Sampler drawing ``demand`` times independent lognormal factors with median 1."""
+    demand = np.asarray(demand, dtype=float)
+
+    def sample(rng, size):
+        return demand * rng.lognormal(0.0, spread, (size,) + demand.shape)
+    return sample
+
+
+def stressTest(x, instance, nPaths=100000, sampler=None, spread=0.2, seed=0, chunk=10000, quantiles=QUANTILES):
+    """Simulate the stock of plan ``x`` (products x months) over ``nPaths`` demand paths.
+
+    ``sampler(rng, size)`` returns ``size`` demand matrices; by default the
+    demand of ``instance`` with lognormal noise of ``spread``.  Returns the
+    share of paths with a stockout (stock below storageMin in some month),
+    per product and month the stockout probability and expected shortfall,
+    and the mean and quantiles of the plan cost (salary plus holding cost
+    of the positive stock).
+    """
+    x = np.asarray(x, dtype=float)
+    sampler = sampler if sampler is not None else lognormalDemand(instance.demand, spread)
+    rng = np.random.default_rng(seed)
+    storageMin = np.broadcast_to(instance.storageMin, x.shape)
+    production = instance.prodCapability[:, None] * x
+    salary = float(x.sum(axis=0) @ instance.workerCosts)
+
+    start = time.perf_counter()
+    stockouts = 0
+    monthStockouts = np.zeros(x.shape)
+    shortfall = np.zeros(x.shape)
+    stock = np.zeros(x.shape)
+    costs = np.empty(nPaths)
+    for begin in range(0, nPaths, chunk):
+        size = min(chunk, nPaths - begin)
+        r = np.cumsum(production - sampler(rng, size), axis=-1)      # (paths, products, months)
+        short = storageMin - r
+        below = short > 0
+        stockouts += int(below.any(axis=(1, 2)).sum())
+        monthStockouts += below.sum(axis=0)
+        shortfall += np.clip(short, 0, None).sum(axis=0)
+        held = np.clip(r, 0, None)
+        stock += held.sum(axis=0)
+        costs[begin:begin + size] = salary + held.sum(axis=2) @ instance.holdingCosts
+
+    return {'paths': nPaths, 'stockoutRate': stockouts / nPaths, 'monthRisk': monthStockouts / nPaths,
+            'expectedShortfall': shortfall / nPaths, 'expectedStock': stock / nPaths, 'salary': salary,
+            'meanCost': float(costs.mean()), 'quantiles': dict(zip(quantiles, np.quantile(costs, quantiles))),
+            'simulationTime': time.perf_counter() - start}
+
+
+def riskTable(report, name='monthRisk'):
+    """Per product and month values of a stressTest report as a DataFrame."""
+    values = report[name]
+    return pd.DataFrame(values, index=[str(i + 1) for i in range(values.shape[0])],
+                        columns=monthNames(values.shape[1]))
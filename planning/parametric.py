@@ -0,0 +1,219 @@
+# Products Manufacturing with lowest cost
+# Exact parametric curves of the continuous model A
+#
+# For the LP, the optimal cost is piecewise linear in any single objective
+# coefficient (concave) or demand right-hand side (convex).  Instead of
+# re-solving on a grid, parametricCurve solves once per linear piece: from
+# the optimal basis it computes how far the parameter can move before the
+# basis stops being optimal (objective) or feasible (right-hand side),
+# records the piece, steps just past the breakpoint and re-solves from the
+# previous basis.
+
+
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB
+from scipy.sparse.linalg import splu
+
+from .template import PlanningTemplate, parseParameter
+
+
+# parameters that enter the objective or the right-hand side of formulation A
+OBJECTIVE_PARAMETERS = ('workerCosts', 'holdingCosts')
+RHS_PARAMETERS = ('demand',)
+
+
+class Segment:
+    """One linear piece of the curve on [lo, hi].
+
+    The optimal cost is ``value + slope * (theta - lo)`` and the plan is
+    ``x + (theta - lo) * dx`` (dx is zero for objective parameters, where the
+    plan is constant on a piece).
+    """
+
+    def __init__(self, lo, hi, value, slope, x, r, dx=None, dr=None):
+        self.lo, self.hi = lo, hi
+        self.value, self.slope = value, slope
+        self.x, self.r = x, r
+        self.dx = dx if dx is not None else np.zeros_like(x)
+        self.dr = dr if dr is not None else np.zeros_like(r)
+
+    def cost(self, theta):
+        return self.value + self.slope * (theta - self.lo)
+
+    def plan(self, theta):
+        return self.x + (theta - self.lo) * self.dx, self.r + (theta - self.lo) * self.dr
+
+    def __repr__(self):
+        return '<Segment [%g, %g] cost %.2f slope %.4f>' % (self.lo, self.hi, self.value, self.slope)
+
+
+class ParametricCurve:
+    """The optimal cost of A as a function of one parameter on [lo, hi].
+
+    ``complete`` is False when maxSolves ran out first; the segments then
+    only cover [lo, hi of the last segment].
+    """
+
+    def __init__(self, path, segments, solves, complete=True):
+        self.path = path
+        self.segments = segments
+        self.solves = solves
+        self.complete = complete
+
+    @property
+    def breakpoints(self):
+        return [segment.lo for segment in self.segments[1:]]
+
+    @property
+    def slopes(self):
+        return [segment.slope for segment in self.segments]
+
+    def segment(self, theta):
+        for segment in self.segments:
+            if theta <= segment.hi:
+                return segment
+        return self.segments[-1]
+
+    def cost(self, theta):
+        return self.segment(theta).cost(theta)
+
+    def plan(self, theta):
+        return self.segment(theta).plan(theta)
+
+
+def _basis(model, A):
+    # basic columns of [A | I] (structural variables, then row slacks) and
+    # the bounds of every column in that standard form
+    vbasis = np.array(model.getAttr('VBasis'))
+    cbasis = np.array(model.getAttr('CBasis'))
+    sense = np.array(model.getAttr('Sense'))
+    nVars, nRows = A.shape[1], A.shape[0]
+    basic = np.concatenate([np.flatnonzero(vbasis == 0), nVars + np.flatnonzero(cbasis == 0)])
+    if len(basic) != nRows:
+        raise RuntimeError('the solve did not return a basis (%d basic columns for %d rows)' % (len(basic), nRows))
+    full = sp.hstack([A, sp.eye(nRows)], format='csc')
+    slackLB = np.where(sense == '>', -np.inf, 0.0)
+    slackUB = np.where(sense == '<', np.inf, 0.0)
+    lb = np.concatenate([model.getAttr('LB'), slackLB])
+    ub = np.concatenate([model.getAttr('UB'), slackUB])
+    status = np.concatenate([vbasis, np.where(cbasis == 0, 0, -1)])
+    return full, basic, lb, ub, status
+
+
+def _ratio(values, steps, tol):
+    # largest t >= 0 with values + t * steps >= 0 wherever steps < 0
+    falling = steps < -tol
+    if not falling.any():
+        return np.inf
+    return max(0.0, np.min(values[falling] / -steps[falling]))
+
+
+def _objectiveRange(model, A, c, d, tol):
+    # how far the objective can move along c + t*d, forwards and backwards,
+    # with the current basis staying dual feasible
+    full, basic, lb, ub, status = _basis(model, A)
+    nRows = A.shape[0]
+    cFull = np.concatenate([c, np.zeros(nRows)])
+    dFull = np.concatenate([d, np.zeros(nRows)])
+    lu = splu(full[:, basic].T.tocsc())
+    y, dy = lu.solve(cFull[basic]), lu.solve(dFull[basic])
+    reduced = cFull - full.T @ y
+    step = dFull - full.T @ dy
+
+    # nonbasic at the lower bound needs a reduced cost >= 0, at the upper
+    # bound <= 0; fixed columns (equality slacks) never leave the bound
+    free = (status != 0) & (lb < ub)
+    sign = np.where(status == -2, -1.0, 1.0)
+    values, steps = (sign * reduced)[free], (sign * step)[free]
+    return _ratio(values, steps, tol), _ratio(values, -steps, tol)
+
+
+def _rhsRange(model, A, e, tol):
+    # how far the right-hand side can move along b + t*e with the current
+    # basis staying primal feasible, and how the basic values move
+    full, basic, lb, ub, status = _basis(model, A)
+    lu = splu(full[:, basic].tocsc())
+    change = lu.solve(e)
+    values = np.concatenate([model.getAttr('X'), model.getAttr('Slack')])[basic]
+    # slacks in Gurobi are rhs - row activity, which is the slack column here
+    room = np.concatenate([values - lb[basic], ub[basic] - values])
+    forward = _ratio(room, np.concatenate([change, -change]), tol)
+    backward = _ratio(room, np.concatenate([-change, change]), tol)
+    direction = np.zeros(full.shape[1])
+    direction[basic] = change
+    return forward, backward, direction[:A.shape[1]]
+
+
+def parametricCurve(path, lo, hi, instance=None, template=None, tol=1e-9, maxSolves=10000):
+    """Exact optimal cost of formulation A for ``path`` between lo and hi.
+
+    ``path`` is an objective parameter (workerCosts[k], holdingCosts[i], or a
+    slice of them moving together) or a demand entry/slice.  When
+    ``maxSolves`` runs out before hi is reached, the curve is returned with
+    ``complete`` False.
+    """
+    name, _ = parseParameter(path)
+    if name not in OBJECTIVE_PARAMETERS + RHS_PARAMETERS:
+        raise ValueError('parametric curves exist for %s, not %s'
+                         % (', '.join(OBJECTIVE_PARAMETERS + RHS_PARAMETERS), name))
+    own = template is None
+    template = template if template is not None else PlanningTemplate('A', instance)
+    if template.model.IsMIP:
+        raise ValueError('parametric curves need the LP formulation A')
+    model = template.model
+    model.setParam('OutputFlag', 0)
+    original = np.array(template.get(path), dtype=float, copy=True)
+    objective = name in OBJECTIVE_PARAMETERS
+
+    # direction of the change in the objective or rhs vector per unit of theta
+    template.set(path, 0.0)
+    model.update()
+    base = np.array(model.getAttr('Obj' if objective else 'RHS'))
+    template.set(path, 1.0)
+    model.update()
+    direction = np.array(model.getAttr('Obj' if objective else 'RHS')) - base
+    A = model.getA().tocsr()
+    shape, nX = template.vars['x'].shape, template.vars['x'].size
+
+    segments, solves, theta, complete = [], 0, float(lo), False
+    try:
+        while solves < maxSolves:
+            template.set(path, theta)
+            model.optimize()
+            solves += 1
+            if model.Status != GRB.OPTIMAL:
+                raise RuntimeError('formulation A has no optimal solution at %s = %g (status %d)'
+                                   % (path, theta, model.Status))
+            solution = np.array(model.getAttr('X'))
+            if objective:
+                c = np.array(model.getAttr('Obj'))
+                forward, backward = _objectiveRange(model, A, c, direction, tol)
+                slope, move = float(direction @ solution), np.zeros_like(solution)
+            else:
+                forward, backward, move = _rhsRange(model, A, direction, tol)
+                slope = float(np.array(model.getAttr('Pi')) @ direction)
+
+            start = max(float(lo), theta - backward) if segments else float(lo)
+            end = min(float(hi), theta + forward)
+            value = model.ObjVal - slope * (theta - start)
+            at = solution - (theta - start) * move
+            segment = Segment(start, end, value, slope, at[:nX].reshape(shape), at[nX:2 * nX].reshape(shape),
+                              move[:nX].reshape(shape), move[nX:2 * nX].reshape(shape))
+            if segments and abs(segments[-1].slope - slope) <= tol * max(1.0, abs(slope)) and \
+                    np.allclose(segments[-1].dx, segment.dx):
+                segments[-1].hi = end       # degenerate basis change, same piece
+            else:
+                if segments:
+                    segments[-1].hi = start
+                segments.append(segment)
+            if end >= hi:
+                complete = True
+                break
+            # step just past the breakpoint, the next basis starts there
+            theta = end + max(1e-6, 1e-9 * abs(end))
+    finally:
+        template.set(path, original if original.ndim else float(original))
+        if own:
+            template.dispose()
+    return ParametricCurve(path, segments, solves, complete)
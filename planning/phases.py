@@ -0,0 +1,175 @@
+# Products Manufacturing with lowest cost
+# Phase-level time and memory profile of building, solving and reporting
+#
+# A script spends its runtime in phases that the Gurobi log does not show:
+# the addVar loops, the model.update() after every variable family, the
+# quicksum generators of the objective, the constraint loops, model.write,
+# optimize() and printing the pandas tables.  The builders, solve() and
+# sweep() accept a PhaseProfiler and wrap each phase in profiler.phase(name),
+# which adds up the wall time, the RSS delta and, with ``memory``, the peak
+# and net Python allocations of the phase (tracemalloc).  Without a profiler
+# the phases cost one no-op context manager each.
+#
+#   variables    addVar / addMVar         update       model.update() after building
+#   objective    objective expression     constraints  constraint rows
+#   write        model.write              convert      the model for HiGHS
+#   optimize     model.optimize()         extract      reading the solution
+#   report       cost lines and tables
+#
+# profileRun measures one script-like run, phaseTable and aggregatePhases
+# turn many runs (a sweep, a benchmark) into one table.
+
+
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+
+def rssBytes():
+    """Current resident set size, falling back to the peak where /proc is missing."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class PhaseProfiler:
+    """Seconds, RSS delta and (with ``memory``) Python allocations per phase.
+
+    A phase entered several times, e.g. every update() of a loop builder or
+    every point of a sweep, is summed up and counted in ``calls``.  Phases
+    should not be nested.  With ``memory`` tracemalloc runs until close(),
+    which slows the Python parts of every phase down.
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.totals = {}         # phase: {calls, seconds, rssDelta, pythonPeak, pythonDelta}
+        self._tracing = False
+
+    @contextmanager
+    def phase(self, name):
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing = True
+            tracemalloc.reset_peak()
+            allocated = tracemalloc.get_traced_memory()[0]
+        rss = rssBytes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            total = self.totals.setdefault(name, {'calls': 0, 'seconds': 0.0, 'rssDelta': 0, 'pythonPeak': 0,
+                                                  'pythonDelta': 0})
+            total['calls'] += 1
+            total['seconds'] += seconds
+            total['rssDelta'] += rssBytes() - rss
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                total['pythonPeak'] = max(total['pythonPeak'], peak - allocated)
+                total['pythonDelta'] += current - allocated
+
+    def seconds(self):
+        """{phase: seconds} in the order the phases were first entered."""
+        return {name: total['seconds'] for name, total in self.totals.items()}
+
+    def rows(self):
+        """One dict per phase with its calls, seconds, share of the profiled time and memory in MB."""
+        whole = sum(total['seconds'] for total in self.totals.values())
+        rows = []
+        for name, total in self.totals.items():
+            row = {'phase': name, 'calls': total['calls'], 'seconds': total['seconds'],
+                   'share': total['seconds'] / whole if whole > 0 else 0.0, 'rssDeltaMB': total['rssDelta'] / 2**20}
+            if self.memory:
+                row.update(pythonPeakMB=total['pythonPeak'] / 2**20, pythonDeltaMB=total['pythonDelta'] / 2**20)
+            rows.append(row)
+        return rows
+
+    def columns(self):
+        """The phases as flat fields, ``<phase>Time`` and the memory ``<phase>RssMB`` / ``<phase>PeakMB``."""
+        fields = {}
+        for row in self.rows():
+            fields[row['phase'] + 'Time'] = row['seconds']
+            fields[row['phase'] + 'RssMB'] = row['rssDeltaMB']
+            if self.memory:
+                fields[row['phase'] + 'PeakMB'] = row['pythonPeakMB']
+        return fields
+
+    def close(self):
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _NoProfiler:
+    def phase(self, name):
+        return nullcontext()
+
+
+NO_PROFILER = _NoProfiler()
+
+
+def profileRun(variant, instance=None, builder='loop', write=False, report=True, params=None, memory=True):
+    """Build, solve and report ``variant`` like a script does and profile every phase.
+
+    ``builder`` is 'loop' (the scripts) or 'matrix'; with ``write`` the
+    model is written to output.lp in a temporary directory first, as the
+    scripts do, and with ``report`` the cost lines and tables are formatted.
+    """
+    from .backends import solve
+    from .builder import buildLoopModel, buildMatrixModel
+    from .results import TABLES
+
+    build = {'loop': buildLoopModel, 'matrix': buildMatrixModel}[builder]
+    params = dict({'MIPGap': 0}, **(params or {}), OutputFlag=0)
+    with PhaseProfiler(memory) as profiler:
+        built = build(variant, instance, profiler=profiler)
+        try:
+            if write:
+                with tempfile.TemporaryDirectory() as directory, profiler.phase('write'):
+                    built.model.write(os.path.join(directory, 'output.lp'))
+            result = solve(built, params=params, profiler=profiler)
+            if report:
+                with profiler.phase('report'):
+                    result.report(tuple(TABLES))
+            run = {'variant': variant, 'builder': builder, 'instance': built.instance.name,
+                   'vars': built.model.NumVars, 'constrs': built.model.NumConstrs, 'status': result.status,
+                   'objVal': result.objVal, 'phases': profiler.rows()}
+        finally:
+            built.model.dispose()
+    return run
+
+
+def phaseTable(runs):
+    """One row per run and phase; the fields of a run other than ``phases`` are repeated."""
+    rows = []
+    for run in runs:
+        fields = {name: value for name, value in run.items() if name != 'phases'}
+        rows += [dict(fields, **phase) for phase in run['phases']]
+    return pd.DataFrame(rows)
+
+
+def aggregatePhases(table, by=('variant', 'builder')):
+    """Mean seconds and memory per phase over the runs of ``phaseTable``, with the share per group."""
+    by = [name for name in by if name in table]
+    measures = [name for name in ('seconds', 'rssDeltaMB', 'pythonPeakMB', 'pythonDeltaMB') if name in table]
+    summary = table.groupby(by + ['phase'], sort=False)[measures].mean()
+    summary.insert(0, 'runs', table.groupby(by + ['phase'], sort=False).size())
+    summary['share'] = summary['seconds'] / summary.groupby(level=by, sort=False)['seconds'].transform('sum')
+    return summary.reset_index()
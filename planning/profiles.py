@@ -0,0 +1,90 @@
+# Products Manufacturing with lowest cost
+# Solver parameter profiles per formulation
+#
+# planning.tuning searches Gurobi parameters per formulation and saves the
+# winner here, in ~/.planning/profiles.json (or the file named by the
+# PLANNING_PROFILES environment variable), outside the source tree.  A
+# profile is only applied when asked for: the builders take ``profile=True``
+# and the commands a --profile flag, and the models, results and points
+# record the parameters that were applied.  Parameters set afterwards, e.g.
+# by a template or a benchmark, still take precedence.
+
+
+import json
+import os
+import tempfile
+
+import gurobipy
+from gurobipy import GRB
+
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.planning', 'profiles.json')
+
+PARAMS = [name for name in dir(GRB.Param) if not name.startswith('_')]
+
+_loaded = {}       # path: (mtime, profiles)
+
+
+def profilePath():
+    return os.environ.get('PLANNING_PROFILES', DEFAULT_PATH)
+
+
+def changedParams(model):
+    """All non-default parameters of ``model``, {name: value}."""
+    params = {}
+    for name in PARAMS:
+        try:
+            info = model.getParamInfo(name)
+        except gurobipy.GurobiError:
+            continue
+        if info[2] != info[5]:
+            params[name] = info[2]
+    return params
+
+
+def loadProfiles(path=None):
+    """All saved profiles, {variant: {'params': {...}, ...}}; empty when there is no file."""
+    path = path or profilePath()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+    if path not in _loaded or _loaded[path][0] != mtime:
+        with open(path) as file:
+            _loaded[path] = (mtime, json.load(file))
+    return _loaded[path][1]
+
+
+def profileParams(variant, path=None):
+    """Gurobi parameters of the saved profile of ``variant``."""
+    return dict(loadProfiles(path).get(variant, {}).get('params', {}))
+
+
+def _writeProfiles(profiles, path):
+    # write next to the target and rename, so an interrupted write never leaves half a file
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(handle, 'w') as file:
+        json.dump(profiles, file, indent=1, sort_keys=True)
+        file.write('\n')
+    os.replace(temporary, path)
+    _loaded.pop(path, None)
+
+
+def saveProfile(variant, params, path=None, **report):
+    """Store ``params`` as the profile of ``variant``, with any report fields next to them."""
+    path = path or profilePath()
+    profiles = dict(loadProfiles(path))
+    profiles[variant] = dict(report, params=params)
+    _writeProfiles(profiles, path)
+
+
+def removeProfile(variant, path=None):
+    """Remove the profile of ``variant``; returns whether there was one."""
+    path = path or profilePath()
+    profiles = dict(loadProfiles(path))
+    if profiles.pop(variant, None) is None:
+        return False
+    _writeProfiles(profiles, path)
+    return True
@@ -0,0 +1,161 @@
+# Products Manufacturing with lowest cost
+# Solve results as NumPy arrays, with the script tables on request
+#
+# The scripts read every x[i,k].x, r[i,k].x in Python loops, sum the costs
+# with generators and slice '%.2f' strings with [0:12], [12:24], [24:36].
+# A SolveResult holds one (products x months) float array per variable
+# family, read with one bulk X query each, computes the cost components
+# with array products and only builds the tables when asked to.
+
+
+import numpy as np
+import pandas as pd
+from gurobipy import GRB
+
+
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Agu', 'Sept', 'Oct', 'Nov', 'Dec')
+
+TABLES = {'x': 'Worker quantity per month per type', 'r': 'Remaining product quantity per month per type',
+          'n': 'Hired workers per month per type', 'b': 'Fired workers per month per type',
+          'v': 'Fired workers per arrangement moment per type'}
+
+# Implement_A.py and Implement_C.py print the salaries as personnel costs, F and H as salary costs
+SALARY_LABELS = {'A': 'personnel', 'C': 'personnel', 'F': 'salary', 'H': 'salary'}
+
+
+def monthNames(nMonths):
+    # Jan..Dec as in the scripts, with the year appended after the first one
+    return [MONTHS[k % 12] + ('' if k < 12 else str(k // 12 + 1)) for k in range(nMonths)]
+
+
+def costComponents(values, instance):
+    """Holding, salary, firing and training cost of the plan in ``values``.
+
+    ``values`` maps x, r and, depending on the formulation, v, b and a to
+    arrays as in the built models.
+    """
+    x, r = values['x'], values['r']
+    costs = {'holding': float(instance.holdingCosts @ r.sum(axis=1)),
+             'salary': float(x.sum(axis=0) @ instance.workerCosts),
+             'firing': 0.0, 'training': 0.0}
+    if 'v' in values:
+        costs['firing'] = float(instance.firingCost * values['v'].sum())
+    if 'b' in values:
+        costs['firing'] = float(instance.firingCost * values['b'].sum())
+        costs['training'] = float(instance.trainingCost * values['a'].sum())
+    return costs
+
+
+def _familyValues(model, var):
+    # MVar of the matrix builder, or dict of the loop builder keyed like the scripts
+    if not isinstance(var, dict):
+        return np.asarray(var.X, dtype=float)
+    values = np.array(model.getAttr('X', list(var.values())), dtype=float)
+    keys = list(var)
+    if isinstance(keys[0], tuple):
+        values = values.reshape(len({key[0] for key in keys}), -1)
+    return values
+
+
+class SolveResult:
+    """Outcome of one solve, the same for every backend.
+
+    ``status`` is a Gurobi status code (GRB.OPTIMAL, GRB.TIME_LIMIT, ...),
+    ``values`` maps the family names of the built model (x, r, ...) to
+    arrays of their values, ``gap`` is the relative MIP gap at the end.
+    ``variant`` is the formulation (A, C, F or H) the values belong to and
+    ``profile`` the tuned parameters the model was built with, if any, and
+    ``hireLimit`` the con5 coefficients of an H model for its certificate.
+    """
+
+    def __init__(self, backend, status, objVal=None, values=None, solveTime=None, nodes=0, gap=None, message='',
+                 instance=None, variant=None, profile=None, hireLimit=None):
+        self.backend = backend
+        self.status = status
+        self.objVal = objVal
+        self.values = values if values is not None else {}
+        self.solveTime = solveTime
+        self.nodes = nodes
+        self.gap = gap
+        self.message = message
+        self.instance = instance
+        self.variant = variant
+        self.profile = profile
+        self.hireLimit = hireLimit
+
+    @classmethod
+    def fromModel(cls, built, solveTime=None, backend='gurobi'):
+        """Read the solution of a solved Gurobi model, one X query per family.
+
+        The families may be MVars or, for buildLoopModel, dicts of Vars.
+        """
+        model = built.model
+        result = cls(backend, model.Status, solveTime=solveTime, nodes=int(model.NodeCount) if model.IsMIP else 0,
+                     instance=built.instance, variant=built.variant, profile=built.profile,
+                     hireLimit=built.hireLimits())
+        if model.SolCount:
+            result.objVal = model.ObjVal
+            result.gap = model.MIPGap if model.IsMIP else 0.0
+            result.values = {name: _familyValues(model, var) for name, var in built.vars.items()}
+        return result
+
+    @property
+    def optimal(self):
+        return self.status == GRB.OPTIMAL
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def __repr__(self):
+        return '<SolveResult %s status %d objVal %s in %.3fs>' % (self.backend, self.status, self.objVal,
+                                                                 self.solveTime or 0.0)
+
+    # ----- derived values -----
+
+    @property
+    def workforce(self):
+        """Workers per month, summed over the product types."""
+        return self.values['x'].sum(axis=0)
+
+    def costs(self):
+        return costComponents(self.values, self.instance)
+
+    def certificate(self):
+        """Independent check of the plan and its cost, see planning.certificate.checkSolution."""
+        from .certificate import checkSolution
+
+        return checkSolution(self.values, self.instance, self.variant, self.objVal, hireLimit=self.hireLimit)
+
+    # ----- tables, only built when asked for -----
+
+    def table(self, name):
+        """DataFrame of family ``name`` with the product types as rows and months as columns."""
+        # solver tolerances leave values like -1e-10, which would print as -0.00
+        values = np.round(self.values[name], 9) + 0.0
+        columns = monthNames(values.shape[1]) if name != 'v' else \
+            [monthNames(self.instance.nMonths)[s] for s in self.instance.S]
+        index = [str(i + 1) for i in range(values.shape[0])]
+        if name == 'x':
+            values, index = np.vstack([values, values.sum(axis=0)]), index + ['sum']
+        return pd.DataFrame(values, index=index, columns=columns)
+
+    def report(self, names=('x', 'r')):
+        """The text the scripts print after a solve."""
+        if not self.values:
+            return '\nNo feasible solution found'
+        lines = ['Total costs : %10.2f euro' % self.objVal]
+        costs = self.costs()
+        lines.append('Total holding costs: %10.2f euro' % costs['holding'])
+        lines.append('Total %s costs: %10.2f euro' % (SALARY_LABELS.get(self.variant, 'salary'), costs['salary']))
+        if 'v' in self.values or 'b' in self.values:
+            lines.append('Total firing costs: %10.2f euro' % costs['firing'])
+        if 'a' in self.values:
+            lines.append('Total training costs: %10.2f euro' % costs['training'])
+        lines.append('')
+        with pd.option_context('display.width', 200, 'display.max_columns', None,
+                               'display.float_format', '{:.2f}'.format):
+            for name in names:
+                if name in self.values:
+                    lines += ['', '-------------------------%s-------------------------' % TABLES[name],
+                              str(self.table(name))]
+        return '\n'.join(lines)
@@ -0,0 +1,121 @@
+# Products Manufacturing with lowest cost
+# Rolling-horizon solve of the hire/fire model H for long horizons
+#
+# The full model grows with the horizon and its contract bookkeeping makes
+# the tree grow faster still.  rollingHorizon solves overlapping windows,
+# e.g. 18 months of which the first 6 are committed, and moves on by the
+# committed months.  Each window is built as H over the months it decides
+# plus a prefix of already committed months long enough for the carried
+# state: inventory r and workforce of the month before, the fireable pool m
+# and fires b of that month and the hires n of the last contractPeriods
+# months.  The prefix variables are fixed to the committed plan and the
+# prefix rows are removed, so every window has the same size and the total
+# time grows linearly with the horizon.
+#
+# With con5's big-M at the default IntFeasTol a window may hire a few
+# workers under a = 1e-5, so windows solve with IntegralityFocus, the
+# committed a follows from the rounded hires and the stitched plan is
+# certified (planning.certificate) before its cost is reported.
+
+
+import time
+
+import numpy as np
+from gurobipy import GRB
+
+from .builder import buildMatrixModel
+from .certificate import checkSolution
+from .heuristic import planCost
+from .instance import baseInstance
+
+
+PLAN = ('x', 'r', 'n', 'm', 'b', 'a')
+
+
+def _windowModel(instance, plan, prefix, start, stop, params):
+    # H over months prefix..stop-1 with the months before start fixed to ``plan``
+    built = buildMatrixModel('H', instance.window(prefix, stop))
+    model, vars, constrs = built.model, built.vars, built.constrs
+    fixed = start - prefix
+    if fixed:
+        for name in PLAN:
+            values = plan[name][..., prefix:start]
+            var = vars[name][..., :fixed]
+            var.LB, var.UB = values, values
+        # the prefix rows assume nothing happened before month ``prefix``
+        rows = constrs['con1'].tolist()
+        removed = [rows[i * built.instance.nMonths + k] for i in instance.I for k in range(fixed)]
+        for name in ('con2', 'con3', 'con4', 'con5'):
+            removed.extend(constrs[name].tolist()[:fixed])
+        model.remove(removed)
+    model.setParam('MIPGap', 0)
+    model.setParam('IntegralityFocus', 1)
+    for name, value in (params or {}).items():
+        model.setParam(name, value)
+    model.update()
+    return built
+
+
+def rollingHorizon(instance=None, window=18, commit=6, params=None):
+    """Solve H over the whole horizon window by window, committing ``commit`` months each time.
+
+    Returns the committed plan (x, r, n, m, b, a over all months), its cost,
+    its certificate (``certified`` is False when the stitched plan breaks a
+    row of H) and per window the months solved, solve time and nodes.
+    """
+    instance = instance if instance is not None else baseInstance()
+    if not 0 < commit <= window:
+        raise ValueError('need 0 < commit <= window, got commit %d and window %d' % (commit, window))
+    nI, nK = instance.nProducts, instance.nMonths
+    # the prefix must reach back to the hires that become fireable in the window
+    history = max(1, instance.contractPeriods)
+    plan = {name: np.zeros((nI, nK)) for name in PLAN if name != 'a'}
+    plan['a'] = np.zeros(nK)
+
+    start, windows = 0, []
+    total = time.perf_counter()
+    while start < nK:
+        stop = min(nK, start + window)
+        prefix = max(0, start - history)
+        built = _windowModel(instance, plan, prefix, start, stop, dict(params or {}, OutputFlag=0))
+        try:
+            began = time.perf_counter()
+            built.model.optimize()
+            if built.model.SolCount == 0:
+                raise RuntimeError('window %d..%d has no feasible plan (status %d)'
+                                   % (start, stop - 1, built.model.Status))
+            end = stop if stop == nK else min(nK, start + commit)
+            for name in PLAN:
+                values = built.vars[name].X[..., start - prefix:end - prefix]
+                # integer values come back within tolerances, round before fixing them
+                plan[name][..., start:end] = values if name == 'r' else np.round(values)
+            # a month with hires pays the training, whatever a came back as
+            plan['a'][start:end] = plan['n'][:, start:end].sum(axis=0) > 0
+            windows.append({'start': start, 'stop': stop, 'committed': end - start,
+                            'status': built.model.Status, 'solveTime': time.perf_counter() - began,
+                            'nodes': built.model.NodeCount, 'vars': built.model.NumVars})
+        finally:
+            built.model.dispose()
+        start = end
+
+    certificate = checkSolution(plan, instance, 'H')
+    return {'plan': plan, 'objVal': planCost(plan, instance), 'certified': certificate['ok'],
+            'failed': certificate['failed'], 'windows': windows, 'solveTime': time.perf_counter() - total}
+
+
+def compareRolling(instance=None, window=18, commit=6, params=None, full=True):
+    """Rolling-horizon result and, with ``full``, the full-horizon optimum of H."""
+    from .template import PlanningTemplate
+
+    instance = instance if instance is not None else baseInstance()
+    rolling = rollingHorizon(instance, window, commit, params)
+    point = None
+    if full:
+        template = PlanningTemplate('H', instance, params=dict(params or {}, OutputFlag=0))
+        try:
+            point = template.optimize()
+            if template.model.Status != GRB.OPTIMAL and template.model.SolCount:
+                point['objVal'] = template.model.ObjVal
+        finally:
+            template.dispose()
+    return rolling, point
@@ -0,0 +1,102 @@
+# Products Manufacturing with lowest cost
+# Declarative scenario matrix executed on a process pool
+#
+# A scenario file holds a base (formulation, Gurobi parameters, optional
+# variants to cross with) and a list of scenarios, each a set of parameter
+# overrides in the paths understood by the template, for example
+#
+#   {"name": "Holding_Cost_Type3_Rises", "set": {"holdingCosts[2]": 100}}
+#   {"name": "Demand_more_In_Month_6&7&8", "scale": {"demand[0, 5:8]": 10}}
+#
+# Every (scenario, variant) pair is solved in its own worker process with a
+# fixed Gurobi Threads budget, and the results come back as one table.
+
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from gurobipy import GRB
+
+from .cache import SolveCache, solveKey
+from .instance import baseInstance
+from .results import SolveResult
+from .template import PlanningTemplate, changedInstance, modelParams
+
+
+def loadScenarios(path):
+    """Read a scenario file and return the list of jobs it describes."""
+    with open(path) as file:
+        spec = json.load(file)
+    base = spec.get('base', {})
+    variants = base.get('variants', [base.get('variant', 'C')])
+    jobs = []
+    for scenario in spec['scenarios']:
+        for variant in scenario.get('variants', variants):
+            jobs.append({'name': scenario['name'], 'variant': variant,
+                         'set': scenario.get('set', {}), 'scale': scenario.get('scale', {}),
+                         'params': dict(base.get('params', {}), **scenario.get('params', {}))})
+    return jobs
+
+
+def poolShape(workers=None, threads=None, cores=None):
+    """Number of worker processes and Gurobi threads per worker for the cores."""
+    cores = cores or os.cpu_count() or 1
+    if workers is None and threads is None:
+        threads = 1
+    if workers is None:
+        workers = max(1, cores // threads)
+    if threads is None:
+        threads = max(1, cores // workers)
+    return workers, threads
+
+
+def solveScenario(job, instance=None, cache=None):
+    """Solve one job and return a flat result row.
+
+    ``cache`` is the directory of a SolveCache shared by the workers.
+    """
+    start = time.perf_counter()
+    instance = changedInstance(instance if instance is not None else baseInstance(), job['set'], job['scale'])
+    template = PlanningTemplate(job['variant'], instance, params=dict(job['params'], OutputFlag=0),
+                                profile=job.get('profile', False))
+    cache = SolveCache(cache) if cache is not None else None
+    key = solveKey(job['variant'], instance, modelParams(template)) if cache is not None else None
+    hit = cache.get(key) if cache is not None else None
+    try:
+        if hit is not None:
+            _, point = hit
+        else:
+            point = template.optimize()
+            if cache is not None and point['objVal'] is not None:
+                cache.put(key, SolveResult.fromModel(template.built, point['solveTime']), point)
+    finally:
+        template.dispose()
+    row = {'scenario': job['name'], 'variant': job['variant'], 'status': point['status'],
+           'objVal': point['objVal']}
+    for component in ('holding', 'salary', 'firing', 'training'):
+        row[component] = point.get(component)
+    row.update(nodes=point['nodes'], solveTime=point['solveTime'], wallTime=time.perf_counter() - start,
+               pid=os.getpid(), profile=json.dumps(point['profile'], sort_keys=True) if point.get('profile') else None)
+    if cache is not None:
+        row['cached'] = hit is not None
+    return row
+
+
+def runScenarios(jobs, workers=None, threads=None, instance=None, cache=None, profile=False):
+    """Solve all jobs on a process pool and collect the rows into a DataFrame.
+
+    With a ``cache`` directory jobs solved before are read from it.  With
+    ``profile`` the saved profiles of the formulations are applied.
+    """
+    workers, threads = poolShape(workers, threads)
+    jobs = [dict(job, params=dict(job['params'], Threads=threads), profile=profile) for job in jobs]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        rows = list(pool.map(solveScenario, jobs, [instance] * len(jobs), [cache] * len(jobs)))
+    table = pd.DataFrame(rows)
+    table.attrs.update(workers=workers, threads=threads, wallTime=time.perf_counter() - start)
+    table['optimal'] = table['status'] == GRB.OPTIMAL
+    return table
@@ -0,0 +1,48 @@
+# Products Manufacturing with lowest cost
+# LP sensitivity report for the continuous model A
+#
+# After an LP solve Gurobi knows, for every cost coefficient and every
+# demand, how far it can move before the optimal basis changes.  The
+# attributes are read in bulk per variable family and returned as tables
+# indexed by (product, month), so many what-if questions need no re-solve.
+
+
+import pandas as pd
+from gurobipy import GRB
+
+
+def _index(instance):
+    return pd.MultiIndex.from_product([instance.I, instance.K], names=['product', 'month'])
+
+
+def sensitivityReport(built):
+    """Ranging, duals and reduced costs of a solved LP as DataFrames.
+
+    ``x`` and ``r``: value, objective coefficient, reduced cost RC and the
+    range SAObjLow..SAObjUp in which the coefficient can move without
+    changing the plan.  ``demand``: marginal cost of one more unit (-Pi of
+    con1) and the range demandLow..demandUp over which it stays valid.
+    """
+    model, instance = built.model, built.instance
+    if model.IsMIP:
+        raise ValueError('sensitivity information exists only for LPs (formulation A), not for %s'
+                         % built.variant)
+    if model.Status != GRB.OPTIMAL:
+        raise ValueError('the model has not been solved to optimality (status %d)' % model.Status)
+
+    index = _index(instance)
+    report = {}
+    for name in ('x', 'r'):
+        var = built.vars[name]
+        report[name] = pd.DataFrame({'value': var.X.ravel(), 'obj': var.Obj.ravel(), 'RC': var.RC.ravel(),
+                                     'SAObjLow': var.SAObjLow.ravel(), 'SAObjUp': var.SAObjUp.ravel()},
+                                    index=index)
+
+    # con1 reads r - cap*x - r_prev = -demand, so the demand ranges are the
+    # negated RHS ranges and one more unit of demand costs -Pi
+    con1 = built.constrs['con1']
+    report['demand'] = pd.DataFrame({'demand': instance.demand.ravel(), 'marginalCost': -con1.Pi,
+                                     'demandLow': -con1.SARHSUp, 'demandUp': -con1.SARHSLow},
+                                    index=index)
+    return report
+
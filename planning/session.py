@@ -0,0 +1,108 @@
+# Products Manufacturing with lowest cost
+# Interactive what-if session on one resident model
+#
+# "What if June-August demand is ten times higher" was answered by copying
+# Implement_C.py to Demand_more_In_Month_6&7&8.py, editing the tuple and
+# running the whole script again.  A PlanningSession keeps the model built,
+# applies deltas in the parameter paths of the template
+#
+#   session.apply(scale={'demand[0, 5:8]': 10})
+#   session.apply(set={'holdingCosts[2]': 100})
+#   session.apply(set={'storageMin': 200})
+#
+# and re-optimizes from the previous solution: the LP basis stays in the
+# resident model and the last incumbent is passed as MIP start.  undo()
+# takes back the last delta, revert() returns to the baseline.
+
+
+import numpy as np
+
+from .template import PARAMETERS, PlanningTemplate
+
+
+class PlanningSession:
+    """A resident model for a sequence of what-if deltas.
+
+    Every point returned by ``apply``, ``undo`` and ``revert`` is the point
+    of PlanningTemplate.optimize with ``delta``, the change of the total
+    cost against the baseline, and ``changes``, the deltas in effect.
+    """
+
+    def __init__(self, variant='C', instance=None, params=None, profile=False):
+        self.template = PlanningTemplate(variant, instance, params=params, profile=profile)
+        self.baseline = self.template.instance.copy()
+        self.history = []          # per apply: (description, [(path, previous value)])
+        self.incumbent = None
+        self.baselinePoint = None
+        self.baselinePoint = self.optimize()
+
+    @property
+    def instance(self):
+        return self.template.instance
+
+    @property
+    def vars(self):
+        return self.template.vars
+
+    def changes(self):
+        return [description for description, _ in self.history]
+
+    def optimize(self):
+        """Re-solve, starting from the last incumbent."""
+        if self.incumbent is not None and self.template.model.IsMIP:
+            self.template.setStart(values=self.incumbent)
+        point = self.template.optimize()
+        if point['objVal'] is not None:
+            self.incumbent = {name: var.X for name, var in self.vars.items() if name != 'r'}
+        baseline = self.baselinePoint or point
+        point['delta'] = point['objVal'] - baseline['objVal'] \
+            if point['objVal'] is not None and baseline['objVal'] is not None else None
+        point['changes'] = self.changes()
+        return point
+
+    def apply(self, set=None, scale=None, optimize=True):
+        """Set parameter paths to values and/or scale them, then re-solve.
+
+        ``set`` and ``scale`` map paths such as 'demand[0, 5:8]' to the new
+        value and to a multiplication factor, as in a scenario file.
+        """
+        updates = [(path, value, False) for path, value in (set or {}).items()] + \
+                  [(path, value, True) for path, value in (scale or {}).items()]
+        previous = []
+        try:
+            for path, value, factor in updates:
+                current = self.template.get(path)
+                previous.append((path, np.copy(current)))
+                self.template.set(path, current * value if factor else value)
+        except ValueError:
+            self._restore(previous)
+            raise
+        description = ', '.join('%s %s %s' % (path, '*=' if factor else '=', value) for path, value, factor in updates)
+        self.history.append((description, previous))
+        return self.optimize() if optimize else None
+
+    def _restore(self, previous):
+        for path, value in reversed(previous):
+            self.template.set(path, value[()] if np.ndim(value) == 0 else value)
+
+    def undo(self, optimize=True):
+        """Take back the last delta."""
+        if not self.history:
+            raise ValueError('no delta to undo')
+        _, previous = self.history.pop()
+        self._restore(previous)
+        return self.optimize() if optimize else None
+
+    def revert(self, optimize=True):
+        """Return every parameter to the baseline."""
+        for name in PARAMETERS:
+            if name == 'quarterLength':
+                continue
+            value = getattr(self.baseline, name)
+            if not np.array_equal(getattr(self.instance, name), value):
+                self.template.set(name, value)
+        self.history = []
+        return self.optimize() if optimize else None
+
+    def dispose(self):
+        self.template.dispose()
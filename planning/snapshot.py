@@ -0,0 +1,197 @@
+# Products Manufacturing with lowest cost
+# Model snapshots written in the background, and their replay
+#
+# The scripts call model.write("output.lp") before every optimize(): a
+# synchronous write of a format that drops the parameters and starts, to one
+# file in the working directory that parallel runs overwrite.  Snapshots
+# are opt-in instead.  capture() takes what it needs from the model on the
+# calling thread, which is cheap (the non-default parameters, the starts
+# with one bulk query per variable family and a copy of the model into an
+# environment of its own), and a background thread writes
+#
+#   <root>/<run>/<nnnn>-<label>/model.mps.gz   the model, compressed
+#                              /model.prm      the non-default parameters
+#                              /model.mst      the MIP start, when one is set
+#                              /meta.json      formulation, instance, outcome
+#
+# where <run> is unique per process.  replaySnapshot reads a snapshot back
+# and solves it again, e.g. on another Gurobi version when bisecting a
+# performance regression; the work units are the machine independent
+# measure to compare.
+
+
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+import gurobipy
+import numpy as np
+from gurobipy import GRB
+
+from .profiles import changedParams
+from .results import SolveResult
+
+
+def _quietEnv():
+    env = gurobipy.Env(empty=True)
+    env.setParam('OutputFlag', 0)
+    env.start()
+    return env
+
+
+class SnapshotWriter:
+    """Write snapshots of built models under ``root`` on a background thread.
+
+    Use as a context manager, or call close(); errors of the writer thread
+    are collected in ``errors``.
+    """
+
+    def __init__(self, root='snapshots', run=None):
+        self.directory = os.path.join(root, run or '%s-%d' % (datetime.now().strftime('%Y%m%d-%H%M%S'), os.getpid()))
+        self.count = 0
+        self.errors = []
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._work, name='snapshots', daemon=True)
+        self._thread.start()
+
+    def capture(self, built, label=None):
+        """Queue a snapshot of ``built`` as it is now; returns its directory."""
+        model = built.model
+        model.update()
+        start = np.concatenate([np.ravel(var.Start) for var in built.vars.values()]) if built.vars else None
+        env = _quietEnv()
+        copy = model.copy(env=env)
+        meta = {'variant': built.variant, 'instance': built.instance.name, 'label': label,
+                'products': built.instance.nProducts, 'months': built.instance.nMonths,
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'gurobi': '.'.join(map(str, gurobipy.gurobi.version())), 'vars': model.NumVars,
+                'constrs': model.NumConstrs}
+        name = '%04d' % self.count + ('-' + re.sub(r'[^\w.=-]+', '_', label) if label else '')
+        path = os.path.join(self.directory, name)
+        self.count += 1
+        self._queue.put(('write', path, (env, copy, changedParams(model), start, meta)))
+        return path
+
+    def record(self, path, result):
+        """Add the outcome of the solve (a SolveResult or a template point) to the snapshot at ``path``."""
+        fields = ('status', 'objVal', 'solveTime', 'runtime', 'nodes', 'gap', 'work')
+        if isinstance(result, SolveResult):
+            outcome = {name: getattr(result, name, None) for name in fields}
+        else:
+            outcome = {name: result.get(name) for name in fields}
+        self._queue.put(('record', path, outcome))
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                kind, path, data = task
+                if kind == 'write':
+                    self._write(path, *data)
+                else:
+                    _updateMeta(path, outcome=data)
+            except Exception as error:       # keep writing the other snapshots
+                self.errors.append((task[1], error))
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path, env, copy, params, start, meta):
+        try:
+            os.makedirs(path, exist_ok=True)
+            for name, value in params.items():
+                copy.setParam(name, value)
+            copy.write(os.path.join(path, 'model.mps.gz'))
+            copy.write(os.path.join(path, 'model.prm'))
+            # the families are added one after the other, so their starts are in column order
+            if start is not None and len(start) == copy.NumVars and (start < GRB.INFINITY).any():
+                copy.setAttr('Start', copy.getVars(), start.tolist())
+                copy.update()
+                copy.write(os.path.join(path, 'model.mst'))
+            _updateMeta(path, **meta)
+        finally:
+            copy.dispose()
+            env.dispose()
+
+    def flush(self):
+        """Wait until everything queued so far is written."""
+        self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _updateMeta(path, **fields):
+    name = os.path.join(path, 'meta.json')
+    meta = {}
+    if os.path.exists(name):
+        with open(name) as file:
+            meta = json.load(file)
+    meta.update(fields)
+    with open(name, 'w') as file:
+        json.dump(meta, file, indent=1, sort_keys=True)
+        file.write('\n')
+
+
+def readMeta(path):
+    try:
+        with open(os.path.join(path, 'meta.json')) as file:
+            return json.load(file)
+    except OSError:
+        return {}
+
+
+def findSnapshots(paths):
+    """Snapshot directories in ``paths``, searched recursively, in name order."""
+    found = []
+    for path in paths:
+        if os.path.exists(os.path.join(path, 'model.mps.gz')):
+            found.append(path)
+        else:
+            found += sorted(os.path.dirname(name) for name in
+                            glob.glob(os.path.join(path, '**', 'model.mps.gz'), recursive=True))
+    return found
+
+
+def replaySnapshot(path, params=None):
+    """Solve the snapshot in ``path`` again; returns its recorded and replayed outcome.
+
+    ``params`` are set after the saved ones, e.g. {'Threads': 1}.
+    """
+    env = _quietEnv()
+    model = gurobipy.read(os.path.join(path, 'model.mps.gz'), env)
+    try:
+        for name in ('model.prm', 'model.mst'):
+            if os.path.exists(os.path.join(path, name)):
+                model.read(os.path.join(path, name))
+        model.setParam('OutputFlag', 0)
+        for name, value in (params or {}).items():
+            model.setParam(name, value)
+        start = time.perf_counter()
+        model.optimize()
+        row = {'snapshot': path, 'status': model.Status, 'objVal': model.ObjVal if model.SolCount else None,
+               'solveTime': time.perf_counter() - start, 'runtime': model.Runtime, 'work': model.Work,
+               'nodes': model.NodeCount if model.IsMIP else 0}
+    finally:
+        model.dispose()
+        env.dispose()
+    meta = readMeta(path)
+    recorded = meta.get('outcome', {})
+    row.update(label=meta.get('label'), variant=meta.get('variant'), gurobi=meta.get('gurobi'),
+               recordedObjVal=recorded.get('objVal'), recordedRuntime=recorded.get('runtime'),
+               recordedWork=recorded.get('work'))
+    return row
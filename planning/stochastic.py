@@ -0,0 +1,228 @@
+# Products Manufacturing with lowest cost
+# Two-stage stochastic version of the quarterly model C, solved by Benders
+#
+# The demand tuples of Implement_C.py are point forecasts; the
+# Varification_D scripts move them up and down by hand.  Here the total
+# workforce of every quarter (the value frozen by con2/con3 of C) is decided
+# first, and for every demand scenario the second stage assigns the workers
+# to the product types, keeps stock r and buys the shortfall u at
+# ``shortageCost`` per unit:
+#
+#   min  sum_k workerCosts[k] W[q(k)] + sum_s p_s Q_s(W)
+#   Q_s(W) = min  holdingCosts @ r + shortageCost * sum u
+#            s.t. r[i,k] - r[i,k-1] - prodCapability[i] x[i,k] - u[i,k] = -demand_s[i,k]
+#                 sum_i x[i,k] = W[q(k)],  x, u >= 0,  r >= storageMin
+#
+# The recourse is an LP for every W, so the L-shaped method applies: the
+# master holds W and one variable theta for the expected recourse, every
+# iteration the scenario LPs are solved for the master's W and their duals
+# on the workforce rows give one aggregated optimality cut
+#
+#   theta >= Q(W') + g @ (W - W'),   g[q] = sum_s p_s sum_{k in q} pi_s[k]
+#
+# The scenario LPs run on a process pool; every worker keeps one resident
+# subproblem and only changes its right-hand side, so the memory and time
+# per iteration grow linearly with the number of scenarios, unlike the
+# extensive form which holds every scenario in one model.
+
+
+import multiprocessing
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB, Model
+
+from .builder import balanceBlocks
+from .instance import baseInstance
+
+
+def demandScenarios(instance, nScenarios, spread=0.2, seed=0):
+    """Demand scenarios around ``instance.demand``, shape (scenarios, products, months).
+
+    Every entry is the forecast times an independent lognormal factor with
+    standard deviation ``spread`` of its logarithm.
+    """
+    rng = np.random.default_rng(seed)
+    factors = rng.lognormal(0.0, spread, (nScenarios,) + instance.demand.shape)
+    return np.round(instance.demand * factors, 1)
+
+
+def quarterCosts(instance):
+    """Salary of one worker kept over each quarter."""
+    quarters = np.arange(instance.nMonths) // instance.quarterLength
+    return np.bincount(quarters, weights=instance.workerCosts, minlength=len(instance.S))
+
+
+def _months(instance):
+    # sum over the product types of a month: one row per month
+    return sp.kron(np.ones((1, instance.nProducts)), sp.eye(instance.nMonths), format='csr')
+
+
+class _Subproblem:
+    """The recourse LP of one scenario, kept resident and re-solved with new data."""
+
+    def __init__(self, instance, shortageCost, threads=1):
+        nI, nK = instance.nProducts, instance.nMonths
+        shape = (nI, nK)
+        self.instance = instance
+        self.quarters = np.arange(nK) // instance.quarterLength
+        model = self.model = Model('Recourse')
+        model.setParam('OutputFlag', 0)
+        model.setParam('Threads', threads)
+        self.x = model.addMVar(shape, lb=0, name='X')
+        self.r = model.addMVar(shape, lb=np.broadcast_to(instance.storageMin, shape), name='R')
+        self.u = model.addMVar(shape, lb=0, name='U')
+        self.r.Obj = np.broadcast_to(instance.holdingCosts[:, None], shape)
+        self.u.Obj = np.full(shape, float(shortageCost))
+        Ax, Ar, rhs = balanceBlocks(instance)
+        xv, rv, uv = self.x.reshape(-1), self.r.reshape(-1), self.u.reshape(-1)
+        self.balance = model.addConstr(Ax @ xv + Ar @ rv - uv == rhs, name='con1')
+        self.link = model.addConstr(_months(instance) @ xv == np.zeros(nK), name='workforce')
+        model.update()
+
+    def solve(self, demand, workforce):
+        """Recourse cost, its gradient in the quarter workforce, holding and shortage cost."""
+        self.balance.RHS = -np.asarray(demand, dtype=float).ravel()
+        self.link.RHS = workforce[self.quarters]
+        self.model.optimize()
+        if self.model.Status != GRB.OPTIMAL:
+            raise RuntimeError('recourse LP ended with status %d' % self.model.Status)
+        gradient = np.bincount(self.quarters, weights=self.link.Pi, minlength=len(workforce))
+        holding = float(self.instance.holdingCosts @ self.r.X.sum(axis=1))
+        return self.model.ObjVal, gradient, holding, self.model.ObjVal - holding
+
+
+# the resident subproblem and the scenarios of a pool worker
+_worker = {}
+
+
+def _initWorker(instance, scenarios, weights, shortageCost):
+    _worker.update(sub=_Subproblem(instance, shortageCost), scenarios=scenarios, weights=weights)
+
+
+def _evaluateChunk(task):
+    # probability-weighted recourse of scenarios start..stop-1
+    start, stop, workforce = task
+    sub, scenarios, weights = _worker['sub'], _worker['scenarios'], _worker['weights']
+    total, gradient = np.zeros(3), np.zeros(len(workforce))
+    for s in range(start, stop):
+        value, slope, holding, shortage = sub.solve(scenarios[s], workforce)
+        total += weights[s] * np.array([value, holding, shortage])
+        gradient += weights[s] * slope
+    return total, gradient
+
+
+def solveStochastic(instance=None, scenarios=None, weights=None, shortageCost=1000.0, workers=1, chunks=None,
+                    tol=1e-6, maxIterations=200, params=None):
+    """Solve the two-stage model over ``scenarios`` with the L-shaped method.
+
+    ``scenarios`` has shape (scenarios, products, months), ``weights`` are
+    their probabilities (equal by default).  The scenario LPs are split into
+    ``chunks`` tasks (4 per worker by default) for ``workers`` processes.
+    Returns the workforce per quarter, the expected cost split into salary,
+    holding and shortage, the bounds and the history of the iterations.
+    """
+    instance = instance if instance is not None else baseInstance()
+    scenarios = np.asarray(scenarios if scenarios is not None else demandScenarios(instance, 100), dtype=float)
+    nScenarios = len(scenarios)
+    weights = np.full(nScenarios, 1.0 / nScenarios) if weights is None else np.asarray(weights, dtype=float)
+    bounds = np.linspace(0, nScenarios, min(nScenarios, chunks or 4 * workers) + 1).astype(int)
+    initargs = (instance, scenarios, weights, shortageCost)
+
+    start = time.perf_counter()
+    pool = None
+    if workers > 1:
+        # start the workers before the master model exists in this process
+        pool = multiprocessing.Pool(workers, initializer=_initWorker, initargs=initargs)
+    else:
+        _initWorker(*initargs)
+    try:
+        costs = quarterCosts(instance)
+        master = Model('Master')
+        master.setParam('OutputFlag', 0)
+        master.setParam('MIPGap', 0)
+        for name, value in (params or {}).items():
+            master.setParam(name, value)
+        W = master.addMVar(len(costs), lb=0, vtype=GRB.INTEGER, name='W')
+        theta = master.addMVar(1, lb=0, name='theta')
+        master.setObjective(costs @ W + theta.sum(), GRB.MINIMIZE)
+
+        lower, upper, best, history = -np.inf, np.inf, None, []
+        for iteration in range(maxIterations):
+            began = time.perf_counter()
+            master.optimize()
+            if master.Status != GRB.OPTIMAL:
+                raise RuntimeError('master problem ended with status %d' % master.Status)
+            workforce = np.round(W.X) + 0.0
+            lower = master.ObjVal
+            solved = time.perf_counter()
+
+            tasks = [(bounds[j], bounds[j + 1], workforce) for j in range(len(bounds) - 1)]
+            parts = pool.map(_evaluateChunk, tasks, chunksize=1) if pool is not None else \
+                [_evaluateChunk(task) for task in tasks]
+            recourse = sum(part[0] for part in parts)
+            gradient = sum(part[1] for part in parts)
+            value = float(costs @ workforce + recourse[0])
+            if value < upper:
+                upper = value
+                best = {'workforce': workforce, 'salary': float(costs @ workforce), 'holding': recourse[1],
+                        'shortage': recourse[2]}
+            history.append({'iteration': iteration, 'lower': lower, 'upper': upper,
+                            'masterTime': solved - began, 'scenarioTime': time.perf_counter() - solved})
+            if upper - lower <= tol * max(1.0, abs(upper)):
+                break
+            master.addConstr(theta[0] - gradient @ W >= recourse[0] - gradient @ workforce, name='cut%d' % iteration)
+        master.dispose()
+    finally:
+        if pool is not None:
+            pool.terminate()
+        else:
+            _worker.pop('sub').model.dispose()
+
+    return dict(best, objVal=upper, lowerBound=lower, gap=(upper - lower) / max(1.0, abs(upper)),
+                iterations=len(history), history=history, scenarios=nScenarios,
+                solveTime=time.perf_counter() - start)
+
+
+def extensiveForm(instance=None, scenarios=None, weights=None, shortageCost=1000.0, params=None):
+    """Solve the two-stage model as one model holding every scenario, for checking small cases."""
+    instance = instance if instance is not None else baseInstance()
+    scenarios = np.asarray(scenarios if scenarios is not None else demandScenarios(instance, 10), dtype=float)
+    nScenarios, nI, nK = scenarios.shape
+    weights = np.full(nScenarios, 1.0 / nScenarios) if weights is None else np.asarray(weights, dtype=float)
+    costs = quarterCosts(instance)
+    quarters = np.arange(nK) // instance.quarterLength
+    shape = (nScenarios, nI * nK)
+
+    model = Model('Extensive')
+    model.setParam('OutputFlag', 0)
+    model.setParam('MIPGap', 0)
+    for name, value in (params or {}).items():
+        model.setParam(name, value)
+    W = model.addMVar(len(costs), lb=0, vtype=GRB.INTEGER, name='W')
+    x = model.addMVar(shape, lb=0, name='X')
+    r = model.addMVar(shape, lb=np.broadcast_to(np.broadcast_to(instance.storageMin, (nI, nK)).ravel(), shape),
+                      name='R')
+    u = model.addMVar(shape, lb=0, name='U')
+    model.update()
+    W.Obj = costs
+    r.Obj = weights[:, None] * np.repeat(instance.holdingCosts, nK)[None, :]
+    u.Obj = np.broadcast_to(weights[:, None] * shortageCost, shape)
+
+    Ax, Ar, _ = balanceBlocks(instance)
+    identity = sp.eye(nScenarios, format='csr')
+    model.addConstr(sp.kron(identity, Ax) @ x.reshape(-1) + sp.kron(identity, Ar) @ r.reshape(-1) - u.reshape(-1)
+                    == -scenarios.reshape(-1), name='con1')
+    link = sp.csr_matrix((np.ones(nK), (np.arange(nK), quarters)), shape=(nK, len(costs)))
+    model.addConstr(sp.kron(identity, _months(instance)) @ x.reshape(-1) -
+                    sp.kron(np.ones((nScenarios, 1)), link) @ W == 0, name='workforce')
+    start = time.perf_counter()
+    try:
+        model.optimize()
+        if model.Status != GRB.OPTIMAL:
+            raise RuntimeError('extensive form ended with status %d' % model.Status)
+        return {'workforce': np.round(W.X) + 0.0, 'objVal': model.ObjVal, 'vars': model.NumVars,
+                'constrs': model.NumConstrs, 'solveTime': time.perf_counter() - start}
+    finally:
+        model.dispose()
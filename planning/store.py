@@ -0,0 +1,169 @@
+# Products Manufacturing with lowest cost
+# Columnar results store: every solve as a typed row of a Parquet dataset
+#
+# The data/*.csv files of Experiments_C&F&H are hand-copied printouts with
+# mixed delimiters.  ResultStore appends one row per solve (scenario key,
+# parameter value, cost components, status, timings) together with the
+# plan arrays to a Parquet dataset partitioned by experiment and
+# formulation, e.g.
+#
+#   results/experiment=ex_f/variant=F/part-<uuid>-0.parquet
+#
+# Reading back uses pyarrow.dataset, so only the requested columns are read
+# and a filter on the experiment skips the other partitions entirely.
+#
+# Every append() is one run with an id of its own and a sequence number that
+# grows with every append.  Storing a sweep again adds its rows next to the
+# old ones; read() returns only the latest row per KEY (experiment,
+# formulation, instance and scenario) unless asked for all.
+
+
+import json
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:        # pyarrow is optional
+    pa = ds = None
+
+
+# plan arrays stored as flat lists, (products x months) families in row-major order
+ARRAYS = ('x', 'r', 'workers', 'holdingByType', 'hired', 'fired')
+
+FLOATS = ('value', 'objVal', 'holding', 'salary', 'firing', 'training', 'solveTime', 'runtime', 'applyTime',
+          'pointTime', 'firstIncumbent')
+
+# the fields that identify a result; later runs supersede earlier rows with the same key
+KEY = ('experiment', 'variant', 'instance', 'scenario')
+
+# the sequence of the last append of this process, so two appends within the
+# clock resolution still get increasing sequences
+_lastSequence = 0
+
+
+def _require():
+    if pa is None:
+        raise RuntimeError('the results store needs pyarrow (pip install pyarrow)')
+
+
+def partitioning():
+    _require()
+    return ds.partitioning(pa.schema([('experiment', pa.string()), ('variant', pa.string())]), flavor='hive')
+
+
+def schema():
+    """Arrow schema of the rows, the same for every experiment."""
+    _require()
+    fields = [('experiment', pa.string()), ('variant', pa.string()), ('run', pa.string()), ('scenario', pa.string()),
+              ('parameter', pa.string()), ('instance', pa.string()), ('nProducts', pa.int32()),
+              ('nMonths', pa.int32()), ('params', pa.string()), ('status', pa.int32()), ('nodes', pa.int64()),
+              ('stored', pa.timestamp('ms')), ('sequence', pa.int64())]
+    fields += [(name, pa.float64()) for name in FLOATS]
+    fields += [(name, pa.list_(pa.float64())) for name in ARRAYS]
+    return pa.schema(fields)
+
+
+def _record(row, names):
+    # one row in plain Python types, arrays flattened to lists
+    record = {name: row.get(name) for name in names}
+    for name in FLOATS:
+        if record[name] is not None:
+            record[name] = float(record[name])
+    for name in ARRAYS:
+        if record[name] is not None:
+            record[name] = np.asarray(record[name], dtype=float).ravel().tolist()
+    if not isinstance(record['params'], (str, type(None))):
+        record['params'] = json.dumps(record['params'], sort_keys=True)
+    for name in ('status', 'nodes', 'nProducts', 'nMonths'):
+        if record[name] is not None:
+            record[name] = int(record[name])
+    return record
+
+
+class ResultStore:
+    """Parquet dataset of solve results under ``root``, appended to run by run."""
+
+    def __init__(self, root):
+        _require()
+        self.root = root
+
+    def append(self, rows):
+        """Write ``rows`` (dicts with the schema fields) as a new run; returns the run id."""
+        names = schema().names
+        rows = [_record(row, names) for row in rows]
+        if not rows:
+            return None
+        global _lastSequence
+        _lastSequence = sequence = max(time.time_ns(), _lastSequence + 1)
+        run, stored = uuid.uuid4().hex, datetime.now()
+        for row in rows:
+            row['run'] = run
+            row['stored'] = row['stored'] or stored
+            row['sequence'] = sequence
+        table = pa.Table.from_pylist(rows, schema=schema())
+        # a unique file name per call, so appends never overwrite each other
+        ds.write_dataset(table, self.root, format='parquet', partitioning=partitioning(),
+                         basename_template='part-%s-{i}.parquet' % run,
+                         existing_data_behavior='overwrite_or_ignore')
+        return run
+
+    def dataset(self):
+        return ds.dataset(self.root, format='parquet', partitioning=partitioning(), schema=schema())
+
+    def read(self, columns=None, experiment=None, variant=None, filter=None, latest=True):
+        """Selected columns of the matching rows as a DataFrame.
+
+        ``experiment`` and ``variant`` prune partitions, ``filter`` is any
+        further pyarrow.dataset expression, e.g. ds.field('status') == 2.
+        With ``latest`` only the most recently stored row per KEY is kept,
+        otherwise the rows of every run are returned.
+        """
+        expression = filter
+        for name, value in (('experiment', experiment), ('variant', variant)):
+            if value is not None:
+                condition = ds.field(name) == value
+                expression = condition if expression is None else expression & condition
+        names = columns
+        if latest and columns is not None:
+            names = list(columns) + [name for name in KEY + ('stored', 'sequence') if name not in columns]
+        frame = self.dataset().to_table(columns=names, filter=expression).to_pandas()
+        if latest:
+            frame = latestRows(frame)
+            if columns is not None:
+                frame = frame[list(columns)]
+        return frame
+
+
+def latestRows(frame):
+    """The most recently stored row per KEY of ``frame``, in the original row order.
+
+    Rows stored at the same time are ordered by the sequence of their append.
+    """
+    if frame.empty:
+        return frame
+    key = list(KEY)
+    order = frame.sort_values(['stored', 'sequence'], kind='stable', na_position='first')
+    keep = order.drop_duplicates(key, keep='last').index
+    return frame.loc[frame.index.isin(keep)].reset_index(drop=True)
+
+
+def sweepRows(experiment, variant, parameter, points, instance=None, params=None):
+    """Rows for the points of a sweep (see planning.template.sweep)."""
+    rows = []
+    for point in points:
+        row = dict(point, experiment=experiment, variant=variant, scenario='%s=%s' % (parameter, point['value']),
+                   parameter=parameter, params=params or {})
+        if instance is not None:
+            row.update(instance=instance.name, nProducts=instance.nProducts, nMonths=instance.nMonths)
+        rows.append(row)
+    return rows
+
+
+def scenarioRows(table, experiment='scenarios'):
+    """Rows for the result table of planning.scenarios.runScenarios."""
+    return [dict(row, experiment=experiment, parameter=None) for row in table.to_dict('records')]
@@ -0,0 +1,91 @@
+# Products Manufacturing with lowest cost
+# The parameter sweeps of Experiments_C&F&H on one resident model
+#
+#   ex_c    January personnel cost, quarterly model C     (Experiment_C.py, ex_c.csv)
+#   ex_c_2  holding cost of type 2, quarterly model C     (ex_c_2.csv)
+#   ex_f    firing cost, model F                          (Experiment_F.py, ex_f.csv)
+#   ex_h    contract periods, hire/fire model H           (Experiment_H.py, ex_h.csv)
+
+
+import time
+
+from .instance import baseInstance
+from .store import sweepRows
+from .template import PlanningTemplate, sweep
+
+
+def holdingByType(result):
+    return {'holdingByType': result.instance.holdingCosts * result['r'].sum(axis=1)}
+
+
+def workforce(result):
+    return {'workers': result.workforce}
+
+
+def plan(result):
+    return {'x': result['x'], 'r': result['r']}
+
+
+def hiresAndFires(result):
+    return {'hired': result['n'].sum(axis=0), 'fired': result['b'].sum(axis=0)}
+
+
+# name: (formulation, parameter, values, extra fields per point)
+EXPERIMENTS = {
+    'ex_c': ('C', 'workerCosts[0]', [0, 1000, 1500, 2000, 2500, 3000, 4000, 5000, 6000, 7000, 8000], holdingByType),
+    'ex_c_2': ('C', 'holdingCosts[1]', [0, 8, 16, 24, 32], workforce),
+    'ex_f': ('F', 'firingCost', list(range(0, 8001, 1000)), workforce),
+    'ex_h': ('H', 'contractPeriods', [0, 3, 6, 9, 12], hiresAndFires),
+}
+
+
+def runExperiment(name, instance=None, rebuild=False, params=None, warmStart=False, cold=False, store=None,
+                  cache=None, snapshots=None, profiler=None, profile=False):
+    """Run one of the EXPERIMENTS and return (build seconds, points).
+
+    With a ResultStore ``store`` every point is also appended to it,
+    together with its plan x and r.  With a SolveCache ``cache`` points
+    solved before are read from it instead.  With a SnapshotWriter
+    ``snapshots`` every solved point is also written as a snapshot.  A
+    PhaseProfiler ``profiler`` adds up the phases of the points.  With
+    ``profile`` the saved profile of the formulation is applied.
+    """
+    variant, path, values, extract = EXPERIMENTS[name]
+    instance = instance if instance is not None else baseInstance()
+    if store is not None:
+        fields = extract
+        extract = lambda result: dict(fields(result), **plan(result))
+    start = time.perf_counter()
+    template = PlanningTemplate(variant, instance, params=params, profile=profile)
+    buildTime = time.perf_counter() - start
+    try:
+        points = sweep(template, path, values, extract=extract, rebuild=rebuild,
+                       warmStart=warmStart, cold=cold, cache=cache, snapshots=snapshots,
+                       profiler=profiler)
+    finally:
+        template.dispose()
+    if store is not None:
+        store.append(sweepRows(name, variant, path, points, instance, params))
+    return buildTime, points
+
+
+def printSweep(name, buildTime, points):
+    variant, path, _, _ = EXPERIMENTS[name]
+    print('%s: %s on formulation %s' % (name, path, variant))
+    print('%10s %14s %12s %12s %12s %12s %9s %9s %9s %7s' % ('value', 'total', 'holding', 'salary', 'firing',
+                                                               'training', 'first s', 'solve s', 'point s', 'nodes'))
+    for point in points:
+        if point['objVal'] is None:
+            print('%10s %14s   status %d' % (point['value'], '-', point['status']))
+            continue
+        first = '%9.4f' % point['firstIncumbent'] if point['firstIncumbent'] is not None else '%9s' % '-'
+        print('%10s %14.2f %12.2f %12.2f %12.2f %12.2f %s %9.4f %9.4f %7d' % (
+            point['value'], point['objVal'], point['holding'], point['salary'], point['firing'],
+            point['training'], first, point['solveTime'], point['pointTime'], point['nodes']))
+    pointTimes = [point['pointTime'] for point in points]
+    print('build %.4fs, %d points, mean %.4fs per point, total %.4fs, %d nodes' % (
+        buildTime, len(points), sum(pointTimes) / len(points), buildTime + sum(pointTimes),
+        sum(point['nodes'] for point in points)))
+    failed = [point['value'] for point in points if point.get('certified') is False]
+    if failed:
+        print('certificate check failed at %s' % ', '.join(map(str, failed)))
@@ -0,0 +1,318 @@
+# Products Manufacturing with lowest cost
+# Parametric model template: build once, re-solve with new coefficients
+#
+# A sweep over e.g. the January personnel cost only touches the objective
+# coefficients of one column of x, so the template keeps the Gurobi model
+# resident and pushes each new parameter value with one bulk setAttr call
+# on the affected MVar/MConstr before calling optimize() again.
+
+
+import re
+import time
+
+import numpy as np
+from gurobipy import GRB
+
+from .builder import addContractConstr, buildMatrixModel
+from .instance import baseInstance
+from .cache import solveKey
+from .certificate import checkSolution
+from .phases import NO_PROFILER
+from .profiles import changedParams
+from .results import SolveResult, costComponents
+from .sensitivity import sensitivityReport
+
+
+# parameters that can be changed on a resident model
+PARAMETERS = ('holdingCosts', 'workerCosts', 'prodCapability', 'demand', 'firingCost',
+              'trainingCost', 'contractPeriods', 'storageMin', 'quarterLength')
+
+_PATH = re.compile(r'^(\w+)(?:\[([^\]]*)\])?$')
+
+
+def parseParameter(path):
+    """Split 'workerCosts[0]' or 'demand[:, 5:8]' into the name and a numpy index."""
+    match = _PATH.match(path.replace(' ', ''))
+    if match is None or match.group(1) not in PARAMETERS:
+        raise ValueError('unknown parameter %r, expected one of %s' % (path, ', '.join(PARAMETERS)))
+    name, index = match.groups()
+    if index is None:
+        return name, None
+    parts = []
+    for part in index.split(','):
+        if ':' in part:
+            parts.append(slice(*(int(bound) if bound else None for bound in part.split(':'))))
+        else:
+            parts.append(int(part))
+    return name, tuple(parts)
+
+
+def _indexed(instance, name, path, index):
+    # a float copy of ``name`` that ``index`` applies to; a scalar storageMin is one value per product and month
+    current = getattr(instance, name)
+    if name == 'storageMin':
+        current = np.broadcast_to(current, instance.demand.shape)
+    values = np.array(current, dtype=float, copy=True)
+    try:
+        values[index]
+    except IndexError:
+        raise ValueError('%s is out of range, %s has shape %s' % (path, name, values.shape)) from None
+    return values
+
+
+def changedInstance(instance, changes=None, scale=None):
+    """Copy of ``instance`` with parameter paths set to new values or scaled.
+
+    ``changes`` and ``scale`` map paths such as 'demand[0, 5:8]' to the new
+    value and to a multiplication factor respectively.
+    """
+    instance = instance.copy()
+    updates = [(path, value, False) for path, value in (changes or {}).items()] + \
+              [(path, value, True) for path, value in (scale or {}).items()]
+    for path, value, factor in updates:
+        name, index = parseParameter(path)
+        current = getattr(instance, name)
+        if np.ndim(current) == 0 and index is None:
+            value = current * value if factor else value
+            setattr(instance, name, int(value) if name in ('contractPeriods', 'quarterLength') else float(value))
+            continue
+        values = np.array(current, dtype=float, copy=True) if index is None else _indexed(instance, name, path, index)
+        target = slice(None) if index is None else index
+        values[target] = values[target] * value if factor else value
+        setattr(instance, name, values)
+    return instance
+
+
+def costBreakdown(built):
+    """Holding, salary, firing and training cost of the current solution."""
+    return costComponents({name: var.X for name, var in built.vars.items()}, built.instance)
+
+
+class PlanningTemplate:
+    """A resident A/C/F/H model whose data can be changed without a rebuild.
+
+    ``set('workerCosts[0]', 3000)`` changes the January personnel cost,
+    ``set('demand[:, 5:8]', values)`` the summer demand and so on; each call
+    rewrites only the Obj, RHS or LB attribute of the affected variables or
+    rows.  ``optimize()`` re-solves and returns the cost components.  With
+    ``profile`` the saved profile of the formulation is applied first.
+    """
+
+    def __init__(self, variant, instance=None, output=False, params=None, sensitivity=False, profile=False):
+        instance = instance if instance is not None else baseInstance()
+        self.built = buildMatrixModel(variant, instance.copy(), output, profile=profile)
+        self.model = self.built.model
+        self.variant = variant
+        # attach the LP ranging tables to every optimal solve of formulation A
+        self.sensitivity = sensitivity and variant == 'A'
+        self.model.setParam('MIPGap', 0)      # find the optimal solution
+        for name, value in (params or {}).items():
+            self.model.setParam(name, value)
+
+    @property
+    def instance(self):
+        return self.built.instance
+
+    @property
+    def vars(self):
+        return self.built.vars
+
+    @property
+    def constrs(self):
+        return self.built.constrs
+
+    # ----- parameter updates -----
+
+    def get(self, path):
+        name, index = parseParameter(path)
+        value = getattr(self.instance, name)
+        return value if index is None else _indexed(self.instance, name, path, index)[index]
+
+    def set(self, path, value):
+        """Change one parameter (or a slice of it) on the resident model."""
+        name, index = parseParameter(path)
+        if index is not None:
+            values = _indexed(self.instance, name, path, index)
+            values[index] = value
+            value = values
+        getattr(self, '_set_' + name)(value)
+
+    def update(self, changes):
+        for path, value in changes.items():
+            self.set(path, value)
+
+    def _set_holdingCosts(self, value):
+        self.instance.holdingCosts = np.asarray(value, dtype=float)
+        self.vars['r'].Obj = np.broadcast_to(self.instance.holdingCosts[:, None], self.vars['r'].shape)
+
+    def _set_workerCosts(self, value):
+        self.instance.workerCosts = np.asarray(value, dtype=float)
+        self.vars['x'].Obj = np.broadcast_to(self.instance.workerCosts, self.vars['x'].shape)
+
+    def _set_demand(self, value):
+        self.instance.demand = np.asarray(value, dtype=float)
+        self.constrs['con1'].RHS = -self.instance.demand.ravel()
+
+    def _set_storageMin(self, value):
+        self.instance.storageMin = value
+        self.vars['r'].LB = np.broadcast_to(value, self.vars['r'].shape)
+
+    def _set_firingCost(self, value):
+        self.instance.firingCost = float(value)
+        for name in ('v', 'b'):
+            if name in self.vars:
+                self.vars[name].Obj = np.full(self.vars[name].shape, self.instance.firingCost)
+
+    def _set_trainingCost(self, value):
+        self.instance.trainingCost = float(value)
+        if 'a' in self.vars:
+            self.vars['a'].Obj = np.full(self.vars['a'].shape, self.instance.trainingCost)
+
+    def _set_prodCapability(self, value):
+        # the capability is the coefficient of x[i,k] in con1[i,k]; there is no
+        # bulk attribute for matrix coefficients, so change them one by one
+        self.instance.prodCapability = np.asarray(value, dtype=float)
+        rows = self.constrs['con1'].tolist()
+        columns = self.vars['x'].reshape(-1).tolist()
+        for row, column, capability in zip(rows, columns,
+                                           np.repeat(self.instance.prodCapability, self.instance.nMonths)):
+            self.model.chgCoeff(row, column, -capability)
+
+    def _set_quarterLength(self, value):
+        raise ValueError('quarterLength changes the freeze rows, build a new template instead')
+
+    def _set_contractPeriods(self, value):
+        # which hires become fireable changes the sparsity of con3, so the
+        # block is replaced while the rest of the model stays resident
+        self.instance.contractPeriods = int(value)
+        if self.variant == 'H':
+            self.model.remove(self.constrs['con3'])
+            self.constrs['con3'] = addContractConstr(self.model, self.vars, self.instance)
+
+    # ----- solve -----
+
+    def setStart(self, names=None, values=None):
+        """Use the current solution as MIP start for the next optimize().
+
+        ``names`` selects the variable families, by default every integer
+        family of the formulation (x and v for F).  ``values`` maps the
+        families to another plan to start from, e.g. a cached SolveResult.
+        """
+        if names is None:
+            names = [name for name, var in self.vars.items() if name != 'r']
+        for name in names:
+            self.vars[name].Start = self.vars[name].X if values is None else values[name]
+
+    def clearStart(self):
+        for var in self.vars.values():
+            var.Start = np.full(var.shape, GRB.UNDEFINED)
+
+    def optimize(self):
+        """Re-solve and return status, objective, cost components and timing.
+
+        ``firstIncumbent`` is the solver time at which the first feasible
+        solution (possibly the MIP start) was found, ``runtime`` the time
+        to prove optimality.
+        """
+        first = []
+
+        def callback(model, where):
+            if where == GRB.Callback.MIPSOL and not first:
+                first.append(model.cbGet(GRB.Callback.RUNTIME))
+
+        start = time.perf_counter()
+        self.model.optimize(callback)
+        point = {'status': self.model.Status, 'solveTime': time.perf_counter() - start,
+                 'runtime': self.model.Runtime, 'work': self.model.Work, 'objVal': None,
+                 'firstIncumbent': first[0] if first else None,
+                 'nodes': self.model.NodeCount if self.model.IsMIP else 0, 'profile': self.built.profile}
+        if self.model.Status == GRB.OPTIMAL:
+            point['objVal'] = self.model.ObjVal
+            point.update(costBreakdown(self.built))
+            if self.sensitivity:
+                point['sensitivity'] = sensitivityReport(self.built)
+        return point
+
+    def dispose(self):
+        self.model.dispose()
+
+
+def sweep(template, path, values, extract=None, rebuild=False, warmStart=False, cold=False, cache=None,
+          certify=True, snapshots=None, profiler=None):
+    """Solve ``template`` for every value of ``path`` and time each point.
+
+    With ``rebuild`` a fresh model is built for every point instead, which is
+    what the experiment scripts do and is kept for comparison.  With
+    ``warmStart`` the optimal plan of each point is passed as MIP start to
+    the next one; ``cold`` instead resets the resident model before every
+    point so that nothing of the previous solve is reused.  ``extract`` may
+    add fields to each point from its SolveResult.  With a SolveCache
+    ``cache`` a point solved before with the same data and parameters is
+    read from the cache and marked ``cached``.  With ``certify`` every
+    optimal plan is checked independently of the solver (see
+    planning.certificate) and marked ``certified``.  With a SnapshotWriter
+    ``snapshots`` every point that is solved is also written as a snapshot
+    (see planning.snapshot) and marked with its directory.  A PhaseProfiler
+    ``profiler`` adds up the time of the phases apply, optimize, extract and
+    certify over all points.
+    """
+    phase = (profiler or NO_PROFILER).phase
+    if warmStart and (rebuild or cold):
+        raise ValueError('warm starts need the resident model, they cannot be combined with rebuild or cold')
+    points = []
+    for value in values:
+        start = time.perf_counter()
+        if rebuild:
+            instance = template.instance.copy()
+            current = PlanningTemplate(template.variant, instance, params=modelParams(template),
+                                       profile=template.built.profile is not None)
+        else:
+            current = template
+        with phase('apply'):
+            current.set(path, value)
+            if cold:
+                current.model.reset(1)
+        applied = time.perf_counter()
+        key = solveKey(current.variant, current.instance, modelParams(current)) if cache is not None else None
+        hit = cache.get(key) if cache is not None else None
+        if hit is not None:
+            result, point = hit
+            result.instance = current.instance
+            point['cached'] = True
+        else:
+            snapshot = snapshots.capture(current.built, '%s=%s' % (path, value)) if snapshots is not None else None
+            with phase('optimize'):
+                point = current.optimize()
+            with phase('extract'):
+                result = SolveResult.fromModel(current.built, point['solveTime'])
+            if snapshot is not None:
+                point['snapshot'] = snapshot
+                snapshots.record(snapshot, point)
+            if cache is not None:
+                point['cached'] = False
+                if point['objVal'] is not None:
+                    cache.put(key, result, point)
+        point.update(value=value, applyTime=applied - start, pointTime=time.perf_counter() - start)
+        if certify and point['objVal'] is not None:
+            with phase('certify'):
+                certificate = checkSolution(result.values, current.instance, current.variant, point['objVal'],
+                                            hireLimit=result.hireLimit)
+            point.update(certified=certificate['ok'], maxViolation=certificate['maxViolation'])
+        if extract is not None and point['objVal'] is not None:
+            with phase('extract'):
+                point.update(extract(result))
+        if warmStart and current.model.IsMIP and result.values:
+            current.setStart(values=result.values)
+        if rebuild:
+            current.dispose()
+        points.append(point)
+    return points
+
+
+def modelParams(template):
+    """All non-default parameters of the resident model, to rebuild or cache with the same settings.
+
+    They include the parameters of a tuned profile, so a re-tune changes
+    the cache keys.
+    """
+    return changedParams(template.model)
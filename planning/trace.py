@@ -0,0 +1,136 @@
+# Products Manufacturing with lowest cost
+# Solve-progress traces: incumbent, bound and gap over time
+#
+# The scripts only show the Gurobi log on the console.  TraceRecorder is a
+# MIP callback that records, per event, the time, incumbent, best bound,
+# nodes and work units: every new incumbent (MIPSOL), the root node
+# (MIPNODE) and MIP progress events at most every ``interval`` seconds, so
+# the cost per callback call is one comparison most of the time.  A trace
+# is saved as a small compressed .npz file, and summarizeTraces answers
+# where the time of a batch of solves went: time to the first incumbent, to
+# a 1% gap, to the optimal incumbent and to the proof of optimality.
+
+
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from gurobipy import GRB
+
+from .results import SolveResult
+
+
+COLUMNS = ('time', 'event', 'incumbent', 'bound', 'nodes', 'work')
+
+EVENTS = {GRB.Callback.MIP: 'MIP', GRB.Callback.MIPSOL: 'MIPSOL', GRB.Callback.MIPNODE: 'MIPNODE', -1: 'END'}
+
+
+class TraceRecorder:
+    """MIP callback collecting the solve progress; pass it to model.optimize."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.rows = []
+        self._next = 0.0
+
+    def __call__(self, model, where):
+        if where == GRB.Callback.MIP:
+            now = model.cbGet(GRB.Callback.RUNTIME)
+            if now < self._next:
+                return
+            self._next = now + self.interval
+            self.rows.append((now, where, model.cbGet(GRB.Callback.MIP_OBJBST), model.cbGet(GRB.Callback.MIP_OBJBND),
+                              model.cbGet(GRB.Callback.MIP_NODCNT), model.cbGet(GRB.Callback.WORK)))
+        elif where == GRB.Callback.MIPSOL:
+            self.rows.append((model.cbGet(GRB.Callback.RUNTIME), where, model.cbGet(GRB.Callback.MIPSOL_OBJ),
+                              model.cbGet(GRB.Callback.MIPSOL_OBJBND), model.cbGet(GRB.Callback.MIPSOL_NODCNT),
+                              model.cbGet(GRB.Callback.WORK)))
+        elif where == GRB.Callback.MIPNODE and model.cbGet(GRB.Callback.MIPNODE_NODCNT) == 0:
+            self.rows.append((model.cbGet(GRB.Callback.RUNTIME), where, model.cbGet(GRB.Callback.MIPNODE_OBJBST),
+                              model.cbGet(GRB.Callback.MIPNODE_OBJBND), 0.0, model.cbGet(GRB.Callback.WORK)))
+
+    def finish(self, model):
+        """Add the final state of a solved model and return the trace arrays."""
+        if model.IsMIP:
+            incumbent = model.ObjVal if model.SolCount else GRB.INFINITY
+            self.rows.append((model.Runtime, -1, incumbent, model.ObjBound, model.NodeCount, model.Work))
+        rows = np.array(self.rows, dtype=float).reshape(-1, len(COLUMNS))
+        return {name: rows[:, j] for j, name in enumerate(COLUMNS)}
+
+
+def gapOf(trace):
+    """Relative gap at every row, inf while there is no incumbent."""
+    incumbent, bound = trace['incumbent'], trace['bound']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gap = np.abs(incumbent - bound) / np.maximum(np.abs(incumbent), 1e-10)
+    return np.where(np.abs(incumbent) < GRB.INFINITY, gap, np.inf)
+
+
+def traceSolve(built, path=None, params=None, interval=0.05, meta=None):
+    """Solve ``built`` with a TraceRecorder; returns the SolveResult and the trace.
+
+    With ``path`` the trace is written there (see writeTrace) together with
+    ``meta`` and the formulation, size and outcome of the solve.
+    """
+    model = built.model
+    for name, value in (params or {}).items():
+        model.setParam(name, value)
+    recorder = TraceRecorder(interval)
+    start = time.perf_counter()
+    model.optimize(recorder)
+    result = SolveResult.fromModel(built, time.perf_counter() - start)
+    trace = recorder.finish(model)
+    trace['meta'] = dict(meta or {}, variant=built.variant, instance=built.instance.name,
+                         products=built.instance.nProducts, months=built.instance.nMonths, status=result.status,
+                         objVal=result.objVal, solveTime=result.solveTime, nodes=result.nodes)
+    if path is not None:
+        writeTrace(trace, path)
+    return result, trace
+
+
+def writeTrace(trace, path):
+    np.savez_compressed(path, meta=np.array(json.dumps(trace.get('meta', {}))),
+                        **{name: trace[name] for name in COLUMNS})
+
+
+def readTrace(path):
+    with np.load(path) as stored:
+        trace = {name: stored[name] for name in COLUMNS}
+        trace['meta'] = json.loads(str(stored['meta']))
+    return trace
+
+
+def _first(times, mask):
+    index = np.flatnonzero(mask)
+    return float(times[index[0]]) if len(index) else None
+
+
+def traceSummary(trace, gap=0.01, tol=1e-6):
+    """Time to the first incumbent, to ``gap``, to the final incumbent and to the end of one trace."""
+    times, incumbent = trace['time'], trace['incumbent']
+    gaps = gapOf(trace)
+    final = incumbent[-1] if len(incumbent) else np.inf
+    found = np.abs(incumbent) < GRB.INFINITY
+    meta = trace.get('meta', {})
+    return dict(meta, events=len(times),
+                firstIncumbent=_first(times, found),
+                timeToGap=_first(times, gaps <= gap),
+                timeToOptimal=_first(times, found & (np.abs(incumbent - final) <= tol * max(1.0, abs(final)))),
+                timeToProof=float(times[-1]) if len(times) and meta.get('status') == GRB.OPTIMAL else None,
+                finalGap=float(gaps[-1]) if len(gaps) else None,
+                work=float(trace['work'][-1]) if len(times) else None)
+
+
+def summarizeTraces(traces, gap=0.01):
+    """One row per trace (dicts, or .npz paths and directories of them) as a DataFrame."""
+    rows = []
+    for trace in traces:
+        if isinstance(trace, str):
+            paths = sorted(glob.glob(os.path.join(trace, '*.npz'))) if os.path.isdir(trace) else [trace]
+            rows += [dict(traceSummary(readTrace(path), gap), file=os.path.basename(path)) for path in paths]
+        else:
+            rows.append(traceSummary(trace, gap))
+    return pd.DataFrame(rows)
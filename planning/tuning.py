@@ -0,0 +1,149 @@
+# Products Manufacturing with lowest cost
+# Solver parameter tuning per formulation over a family of instances
+#
+# The scripts only set MIPGap = 0, although C, F and H have very different
+# structure.  tuneVariant draws parameter settings from SPACE, solves every
+# instance of a family of synthetic instances with each of them (on a
+# process pool, one fresh process per trial) and scores a setting by its
+# total solve time, counting a solve that hits the time limit twice; a
+# setting is abandoned once it took ``slower`` times the defaults.  The
+# winner is compared with the Gurobi defaults on held-out instances, and
+# saved as the profile of the formulation (planning.profiles), which the
+# builders apply when asked to.  A setting that changes an optimum, compared
+# on the instances both it and the defaults solved to optimality, is
+# discarded, and so is an abandoned one.
+
+
+import itertools
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from gurobipy import GRB
+
+from .benchmark import FORMULATIONS
+from .builder import buildMatrixModel
+from .instance import syntheticInstance
+from .profiles import saveProfile
+
+
+SPACE = {'MIPFocus': (0, 1, 2, 3), 'Cuts': (-1, 0, 1, 2), 'Presolve': (-1, 0, 2), 'Heuristics': (0.0, 0.05, 0.2),
+         'Method': (-1, 1, 2), 'Threads': (1, 2, 4)}
+
+SIZES = ((3, 12), (3, 24), (5, 24))
+
+
+def tuningInstances(sizes=SIZES, seeds=(0, 1), quarterLength=3):
+    return [syntheticInstance(products, months, seed, quarterLength=quarterLength)
+            for products, months in sizes for seed in seeds]
+
+
+def candidates(nTrials=20, seed=0, space=None):
+    """The Gurobi defaults followed by ``nTrials`` distinct random settings from ``space``.
+
+    The default space is SPACE with no more threads than cores.
+    """
+    if space is None:
+        cores = os.cpu_count() or 1
+        space = dict(SPACE, Threads=tuple(n for n in SPACE['Threads'] if n <= cores))
+    grid = list(itertools.product(*space.values()))
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(grid), size=min(nTrials, len(grid)), replace=False)
+    return [{}] + [dict(zip(space, (value.item() if hasattr(value, 'item') else value for value in grid[j])))
+                   for j in picks]
+
+
+def _trial(job):
+    # solve every instance with one setting; runs in a worker process
+    times, objVals, optimal = [], [], []
+    remaining, abandoned = job['budget'], False
+    for instance in job['instances']:
+        if remaining <= 0:
+            # slower than the budget allows, the setting has lost already
+            times.append(np.inf)
+            optimal.append(False)
+            objVals.append(np.nan)
+            abandoned = True
+            continue
+        built = buildMatrixModel(job['variant'], instance)
+        model = built.model
+        try:
+            limit = min(job['timeLimit'], remaining)
+            for name, value in dict(OutputFlag=0, MIPGap=0, TimeLimit=limit, **job['params']).items():
+                model.setParam(name, value)
+            start = time.perf_counter()
+            model.optimize()
+            times.append(time.perf_counter() - start)
+            optimal.append(model.Status == GRB.OPTIMAL)
+            # stopped by what is left of the budget rather than by timeLimit
+            abandoned = abandoned or (model.Status == GRB.TIME_LIMIT and limit < job['timeLimit'])
+            objVals.append(model.ObjVal if model.SolCount else np.nan)
+        finally:
+            model.dispose()
+        remaining -= times[-1]
+    return {'params': job['params'], 'times': np.array(times), 'objVals': np.array(objVals),
+            'optimal': np.array(optimal), 'abandoned': abandoned}
+
+
+def _score(trial, timeLimit):
+    return float(np.where(trial['optimal'], trial['times'], 2 * timeLimit).sum())
+
+
+def _runTrials(variant, settings, instances, timeLimit, workers, budget=np.inf):
+    jobs = [{'variant': variant, 'params': params, 'instances': instances, 'timeLimit': timeLimit,
+             'budget': budget} for params in settings]
+    with multiprocessing.Pool(workers, maxtasksperchild=1) as pool:
+        return pool.map(_trial, jobs, chunksize=1)
+
+
+def tuneVariant(formulation, instances=None, validation=None, nTrials=20, seed=0, timeLimit=30, workers=1,
+                slower=3.0, minImprovement=0.05, save=True, path=None):
+    """Search parameters for ``formulation`` (A, C, F, H or annual) and return the report.
+
+    ``instances`` are searched over and ``validation`` (other seeds of the
+    same sizes by default) only used to compare the winner with the
+    defaults: median and 95th percentile of the solve times of both and
+    the relative improvement.  With ``save`` the winner becomes the
+    profile of the formulation when it improves the median validation time
+    by ``minImprovement`` without making the 95th percentile worse.
+    """
+    variant, quarterLength = FORMULATIONS[formulation]
+    instances = instances if instances is not None else tuningInstances(quarterLength=quarterLength)
+    validation = validation if validation is not None else tuningInstances(seeds=(2,), quarterLength=quarterLength)
+    start = time.perf_counter()
+    settings = candidates(nTrials, seed)
+    trials = _runTrials(variant, settings[:1], instances, timeLimit, workers)
+    # a setting that needs more than ``slower`` times the total of the defaults is abandoned
+    trials += _runTrials(variant, settings[1:], instances, timeLimit, workers, slower * _score(trials[0], timeLimit))
+
+    reference = trials[0]
+    rows = []
+    for trial in trials:
+        # a time-limited solve says nothing about the optimum, compare where both are optimal
+        both = trial['optimal'] & reference['optimal']
+        same = bool(np.allclose(trial['objVals'][both], reference['objVals'][both], rtol=1e-6))
+        lost = trial['abandoned'] or not same
+        rows.append({'params': trial['params'], 'score': np.inf if lost else _score(trial, timeLimit),
+                     'optimal': int(trial['optimal'].sum()), 'sameOptima': same, 'abandoned': trial['abandoned']})
+    table = pd.DataFrame(rows)
+    best = table.loc[table['score'].idxmin(), 'params']
+
+    default, = _runTrials(variant, [{}], validation, timeLimit, workers)
+    tuned = _runTrials(variant, [best], validation, timeLimit, workers)[0] if best else default
+    report = {'formulation': formulation, 'variant': variant, 'params': best, 'trials': len(trials),
+              'instances': len(instances), 'validation': len(validation), 'tuningTime': time.perf_counter() - start}
+    for name, q in (('median', 50), ('p95', 95)):
+        before, after = np.percentile(default['times'], q), np.percentile(tuned['times'], q)
+        report.update({name + 'Default': before, name + 'Tuned': after,
+                       name + 'Improvement': (before - after) / before if before > 0 else 0.0})
+    report['table'] = table.sort_values('score')
+    # a profile per formulation of the builders; the annual variant shares C
+    report['saved'] = bool(save and best and formulation in ('A', 'C', 'F', 'H') and
+                           report['medianImprovement'] >= minImprovement and report['p95Improvement'] >= 0)
+    if report['saved']:
+        saveProfile(variant, best, path, tuned=datetime.now().isoformat(timespec='seconds'),
+                    medianImprovement=report['medianImprovement'], p95Improvement=report['p95Improvement'])
+    return report
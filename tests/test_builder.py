@@ -0,0 +1,18 @@
+# Products Manufacturing with lowest cost
+# The matrix builder reproduces the script loops, once their duplicated rows are linted away
+
+import pytest
+
+from planning import VARIANTS, baseInstance, buildLoopModel, buildMatrixModel, lintModel, sameModel
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+def test_loop_and_matrix_build_the_same_model(variant):
+    loop = buildLoopModel(variant, baseInstance())
+    matrix = buildMatrixModel(variant, baseInstance())
+    try:
+        lintModel(loop.model)
+        assert sameModel(loop.model, matrix.model)
+    finally:
+        loop.model.dispose()
+        matrix.model.dispose()
@@ -0,0 +1,56 @@
+# Products Manufacturing with lowest cost
+# What-if deltas on a resident model can be taken back
+
+import pytest
+
+from planning import PlanningSession
+
+
+@pytest.fixture
+def session():
+    session = PlanningSession('C')
+    yield session
+    session.dispose()
+
+
+def test_undo_returns_to_previous_point(session):
+    base = session.baselinePoint['objVal']
+    first = session.apply(scale={'demand[0, 5:8]': 10})
+    second = session.apply(set={'holdingCosts[2]': 100})
+    assert first['objVal'] > base
+    assert second['changes'] == session.changes() and len(second['changes']) == 2
+
+    back = session.undo()
+    assert back['objVal'] == pytest.approx(first['objVal'])
+    back = session.undo()
+    assert back['objVal'] == pytest.approx(base)
+    assert back['delta'] == pytest.approx(0.0, abs=1e-6)
+    with pytest.raises(ValueError):
+        session.undo()
+
+
+def test_revert_restores_baseline(session):
+    base = session.baselinePoint['objVal']
+    session.apply(scale={'demand[0, 5:8]': 10})
+    session.apply(set={'storageMin': 200})
+    point = session.revert()
+    assert point['objVal'] == pytest.approx(base)
+    assert point['changes'] == []
+    assert (session.instance.demand == session.baseline.demand).all()
+
+
+def test_indexed_storage_min_delta_and_undo(session):
+    base = session.baselinePoint['objVal']
+    point = session.apply(set={'storageMin[1, 5]': 200})
+    assert point['objVal'] > base
+    assert session.vars['r'].X[1, 5] >= 200 - 1e-6
+    assert session.template.get('storageMin[1, 5]') == 200
+    back = session.undo()
+    assert back['objVal'] == pytest.approx(base)
+    assert session.template.get('storageMin[1, 5]') == 0
+
+
+def test_out_of_range_index_is_rejected(session):
+    with pytest.raises(ValueError, match='shape'):
+        session.apply(set={'demand[0, 40]': 3})
+    assert session.changes() == []
@@ -0,0 +1,128 @@
+# Products Manufacturing with lowest cost
+# The fast paths agree with plain Gurobi solves of baseInstance()
+
+import numpy as np
+import pytest
+
+from planning import (VARIANTS, SolveCache, baseInstance, buildMatrixModel, constructHirePlan, deriveBounds,
+                      parametricCurve, scaleInstance, solve, solveStochastic, tightenModel)
+from planning.certificate import checkSolution
+from planning.dp import crossCheck
+from planning.lazy import compareLazy
+from planning.rolling import compareRolling
+from planning.stochastic import demandScenarios, extensiveForm
+
+
+PARAMS = {'OutputFlag': 0, 'MIPGap': 0}
+
+
+def _solveA(instance):
+    built = buildMatrixModel('A', instance)
+    try:
+        return solve(built, params=PARAMS).objVal
+    finally:
+        built.model.dispose()
+
+
+def test_parametric_curve_matches_resolves():
+    instance = baseInstance()
+    base = instance.workerCosts[0]
+    curve = parametricCurve('workerCosts[0]', 0.5 * base, 2 * base, instance)
+    assert curve.complete
+    assert not parametricCurve('workerCosts[0]', 0.5 * base, 2 * base, instance, maxSolves=2).complete
+    for theta in np.linspace(0.5 * base, 2 * base, 5):
+        workerCosts = instance.workerCosts.copy()
+        workerCosts[0] = theta
+        assert curve.cost(theta) == pytest.approx(_solveA(instance.copy(workerCosts=workerCosts)), rel=1e-7)
+
+
+def test_closed_form_matches_gurobi():
+    check = crossCheck(baseInstance())
+    assert check['mismatch'] is None
+    assert check['closed']['objVal'] == pytest.approx(check['gurobi']['objVal'], rel=1e-6)
+
+
+def test_benders_matches_extensive_form():
+    instance = baseInstance()
+    scenarios = demandScenarios(instance, 5)
+    benders = solveStochastic(instance, scenarios)
+    extensive = extensiveForm(instance, scenarios)
+    assert benders['objVal'] == pytest.approx(extensive['objVal'], rel=1e-6)
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+def test_certificate_matches_objval(variant):
+    built = buildMatrixModel(variant, baseInstance())
+    try:
+        result = solve(built, params=PARAMS)
+    finally:
+        built.model.dispose()
+    certificate = result.certificate()
+    assert certificate['ok'], certificate['failed']
+    assert certificate['total'] == pytest.approx(result.objVal, rel=1e-6)
+
+
+@pytest.mark.parametrize('variant, label', [('A', 'personnel'), ('C', 'personnel'), ('F', 'salary'), ('H', 'salary')])
+def test_report_uses_the_script_labels(variant, label):
+    built = buildMatrixModel(variant, baseInstance())
+    try:
+        report = solve(built, params=PARAMS).report().splitlines()
+    finally:
+        built.model.dispose()
+    assert report[2].startswith('Total %s costs:' % label)
+
+
+def test_certificate_checks_tightened_hire_rows():
+    built = buildMatrixModel('H', baseInstance())
+    bounds = deriveBounds(built.instance)
+    tightenModel(built, bounds)
+    try:
+        result = solve(built, params=PARAMS)
+    finally:
+        built.model.dispose()
+    np.testing.assert_array_equal(result.hireLimit, bounds['hires'])
+    assert result.certificate()['ok']
+    # more hires than the tightened con5 allows, still far below bigM
+    values = {name: family.copy() for name, family in result.values.items()}
+    month = int(np.argmax(values['a']))
+    values['n'][0, month] += bounds['hires'][month] + 1
+    assert 'con5' in checkSolution(values, built.instance, 'H', hireLimit=result.hireLimit)['failed']
+
+
+def test_heuristic_plan_keeps_storage_min():
+    instance = baseInstance().copy(storageMin=20.0)
+    plan = constructHirePlan(instance)
+    values = {name: plan[name] for name in ('x', 'r', 'n', 'm', 'b', 'a')}
+    certificate = checkSolution(values, instance, 'H', objVal=plan['objVal'])
+    assert certificate['ok'], certificate['failed']
+
+
+def test_lazy_contract_rows_keep_the_optimum():
+    points = compareLazy(baseInstance())
+    assert points['lazy']['objVal'] == pytest.approx(points['full']['objVal'], rel=1e-6)
+    assert points['lazy']['certified'], points['lazy']['failed']
+
+
+@pytest.mark.parametrize('contractPeriods', [0, 3, 6])
+def test_rolling_plan_is_certified_and_not_below_the_optimum(contractPeriods):
+    instance = scaleInstance(baseInstance(contractPeriods=contractPeriods), 3, 48)
+    rolling, full = compareRolling(instance, window=10, commit=3)
+    assert rolling['certified'], rolling['failed']
+    assert checkSolution(rolling['plan'], instance, 'H', rolling['objVal'])['ok']
+    assert rolling['objVal'] >= full['objVal'] - 1e-6 * full['objVal']
+
+
+def test_cache_hit_matches_resolve(tmp_path):
+    cache = SolveCache(str(tmp_path))
+    results = []
+    for _ in range(2):
+        built = buildMatrixModel('C', baseInstance())
+        try:
+            results.append(cache.solve(built, params=PARAMS))
+        finally:
+            built.model.dispose()
+    assert (cache.misses, cache.hits) == (1, 1)
+    solved, cached = results
+    assert cached.objVal == solved.objVal
+    for name, values in solved.values.items():
+        np.testing.assert_array_equal(cached.values[name], values)
@@ -0,0 +1,47 @@
+# Products Manufacturing with lowest cost
+# Results store: storing a sweep twice keeps one row per point
+
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from planning.store import ResultStore, sweepRows
+
+
+def _points(objVal):
+    return [{'value': value, 'status': 2, 'objVal': objVal + value, 'workers': [[value, value + 1]]}
+            for value in (1.0, 2.0, 3.0)]
+
+
+def test_append_twice_keeps_latest_run(tmp_path):
+    store = ResultStore(str(tmp_path))
+    first = store.append(sweepRows('ex_c', 'C', 'salary', _points(100.0)))
+    second = store.append(sweepRows('ex_c', 'C', 'salary', _points(200.0)))
+    assert first != second
+
+    latest = store.read(['value', 'objVal'], experiment='ex_c').sort_values('value')
+    assert list(latest.columns) == ['value', 'objVal']
+    assert list(latest['objVal']) == [201.0, 202.0, 203.0]
+
+    every = store.read(['run', 'value'], experiment='ex_c', latest=False)
+    assert len(every) == 6
+    assert set(every['run']) == {first, second}
+
+
+def test_same_stored_time_keeps_later_append(tmp_path):
+    store = ResultStore(str(tmp_path))
+    stored = datetime(2026, 1, 1)
+    for objVal in (100.0, 200.0, 300.0):
+        store.append(sweepRows('ex_c', 'C', 'salary', [dict(point, stored=stored) for point in _points(objVal)]))
+    latest = store.read(['value', 'objVal'], experiment='ex_c').sort_values('value')
+    assert list(latest['objVal']) == [301.0, 302.0, 303.0]
+
+
+def test_experiments_are_kept_apart(tmp_path):
+    store = ResultStore(str(tmp_path))
+    store.append(sweepRows('ex_c', 'C', 'salary', _points(100.0)))
+    store.append(sweepRows('ex_f', 'F', 'firing', _points(300.0)))
+    assert len(store.read(['value'])) == 6
+    assert list(store.read(['objVal'], experiment='ex_f')['objVal'].sort_values()) == [301.0, 302.0, 303.0]